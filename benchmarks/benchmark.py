@@ -0,0 +1,146 @@
+"""Times the stages of surveychecks on synthetic templates and data at several scales.
+
+Run from the repository root, e.g.
+    python -m benchmarks.benchmark --variables 100 500 --rows 10000 100000 --depth 3
+"""
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.generators import surveyData, syntheticVariables, templateLines, writeTemplateDocx
+from surveychecks.helper.docReader import docReader
+from surveychecks.helper.parser import parser
+from surveychecks.surveychecks import surveychecks
+
+filterMissVal = -55
+
+
+def timeStage(function, repeat=1):
+    """runs a stage repeat times with print output suppressed
+
+    Returns:
+        float: fastest wall time in seconds
+    """
+    times = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def templateStages(documentPath, repeat=1):
+    """times reading, parsing and compiling the template
+
+    Returns:
+        tuple: dictionary of stage timings and the compiled surveychecks object
+    """
+    timings = {}
+    timings["read document"] = timeStage(lambda: list(docReader(documentPath).iterText()), repeat)
+    chunks = list(docReader(documentPath).iterText())
+    timings["extract question blocks"] = timeStage(lambda: parser(chunks=iter(chunks)).getVarInfo(), repeat)
+    timings["compile template"] = timeStage(lambda: surveychecks(None, documentPath, useCache=False), repeat)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        checks = surveychecks(None, documentPath, useCache=False)
+
+    def parseVariableLines():
+        # dropping the lines memoized by the parser, such that every line is parsed again
+        checks.pars.parsedLines = {}
+        checks.makeBlockLines()
+
+    timings["parse variable lines"] = timeStage(parseVariableLines, repeat)
+
+    def expandFilters():
+        checks.expandedFilterExpressions = {}
+        checks.expandFilterDic()
+
+    timings["expand filters"] = timeStage(expandFilters, repeat)
+    timings["filter graph"] = timeStage(lambda: (checks.makeFilterGraph(), checks.makeAllFilterDicConditions()), repeat)
+
+    return timings, checks
+
+
+def checkStages(checks, dataframe, repeat=1, nJobs=1):
+    """times the checks on a data frame, filter masks are computed from scratch for each filter check
+
+    Returns:
+        dictionary: stage timings
+    """
+    checks.dataframe = dataframe
+
+    def filterCheck(**kwargs):
+        checks.dataMaskCache().clear()
+        checks.filterCheck(filterMissVal, nJobs=nJobs, **kwargs)
+
+    def runAll():
+        checks.dataMaskCache().clear()
+        checks.runAll(filterMissVal, nJobs=nJobs)
+
+    timings = {}
+    timings["varCheck"] = timeStage(checks.varCheck, repeat)
+    timings["rangeCheck(unallowed)"] = timeStage(lambda: checks.rangeCheck(nJobs=nJobs), repeat)
+    timings["rangeCheck(missing)"] = timeStage(lambda: checks.rangeCheck("missing", nJobs=nJobs), repeat)
+    timings["filterCheck(unallowed)"] = timeStage(lambda: filterCheck(), repeat)
+    timings["filterCheck(missing)"] = timeStage(lambda: filterCheck(checkType="missing"), repeat)
+    timings["filterCheck(expanded)"] = timeStage(lambda: filterCheck(expandedCheck=True), repeat)
+    timings["runAll"] = timeStage(runAll, repeat)
+
+    return timings
+
+
+def run(variableCounts, rowCounts, rangeWidth=10, filterDepth=3, repeat=1, nJobs=1, seed=0):
+    """benchmarks all combinations of variable and row counts
+
+    Returns:
+        list: (variables, rows, stage, seconds) for each timed stage
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tempDir:
+        for nVariables in variableCounts:
+            variables = syntheticVariables(nVariables, rangeWidth, filterDepth)
+            documentPath = Path(tempDir) / f"template_{nVariables}.docx"
+            writeTemplateDocx(templateLines(variables, filterMissVal=filterMissVal), documentPath)
+
+            timings, checks = templateStages(documentPath, repeat)
+            for stage, seconds in timings.items():
+                results.append((nVariables, None, stage, seconds))
+                printResult(results[-1])
+
+            for nRows in rowCounts:
+                dataframe = surveyData(variables, nRows, filterMissVal=filterMissVal, seed=seed)
+                for stage, seconds in checkStages(checks, dataframe, repeat, nJobs).items():
+                    results.append((nVariables, nRows, stage, seconds))
+                    printResult(results[-1])
+
+    return results
+
+
+def printResult(result):
+    nVariables, nRows, stage, seconds = result
+    rows = "" if nRows is None else nRows
+    print(f"{nVariables:>10} {rows:>10} {stage:<24} {seconds:>10.4f}")
+
+
+def main():
+    argParser = argparse.ArgumentParser(description="benchmark surveychecks on synthetic templates and data")
+    argParser.add_argument("--variables", type=int, nargs="+", default=[100, 500], help="numbers of variables")
+    argParser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000], help="numbers of respondents")
+    argParser.add_argument("--width", type=int, default=10, help="number of allowed values per variable")
+    argParser.add_argument("--depth", type=int, default=3, help="length of the filter chains")
+    argParser.add_argument("--repeat", type=int, default=3, help="repetitions per stage, the fastest is reported")
+    argParser.add_argument("--jobs", type=int, default=1, help="nJobs of the checks")
+    argParser.add_argument("--seed", type=int, default=0, help="seed of the data generator")
+    args = argParser.parse_args()
+
+    print(f"{'variables':>10} {'rows':>10} {'stage':<24} {'seconds':>10}")
+    run(args.variables, args.rows, args.width, args.depth, args.repeat, args.jobs, args.seed)
+
+
+if __name__ == "__main__":
+    main()
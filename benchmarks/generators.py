@@ -0,0 +1,186 @@
+import docx
+import numpy as np
+import pandas as pd
+
+
+class syntheticVariable:
+    """Specification of one generated survey variable
+
+    Args:
+        name (string): variable name
+        kind (string): "range" (e.g. 'V == 1-10'), "list" (e.g. 'V == 1, 2, 3') or "interval" (e.g. 'V >= 0 & V <= 10')
+        width (int): number of allowed values, upper bound of the interval for "interval"
+        parent (syntheticVariable): filter variable, None for unfiltered variables
+    """
+
+    __slots__ = ("name", "kind", "width", "parent")
+
+    def __init__(self, name, kind, width, parent=None):
+        self.name = name
+        self.kind = kind
+        self.width = width
+        self.parent = parent
+
+    def __repr__(self):
+        return f"syntheticVariable({self.name!r}, {self.kind!r}, {self.width})"
+
+    def rangeCondition(self, missings):
+        """range condition in the syntax of the programing template"""
+        codes = ", ".join(str(code) for code in missings)
+        if self.kind == "range":
+            return f"{self.name} == 1-{self.width} + {codes}"
+        if self.kind == "list":
+            values = ", ".join(str(value) for value in range(1, self.width + 1))
+            return f"{self.name} == {values} + {codes}"
+
+        return f"({self.name} >= 0 & {self.name} <= {self.width}) | {self.name} == {codes}"
+
+    def routingCondition(self):
+        """filter condition a child of this variable is asked under, in the syntax of the programing template"""
+        if self.kind == "interval":
+            return f"{self.name} >= {self.width // 2}"
+
+        return f"{self.name} == 1-{max(1, self.width // 2)}"
+
+    def routed(self, values):
+        """boolean mask of the values a child of this variable is asked under"""
+        if self.kind == "interval":
+            return values >= self.width // 2
+
+        return (values >= 1) & (values <= max(1, self.width // 2))
+
+    def allowedValues(self, rng, size):
+        """random values within the range of the variable"""
+        if self.kind == "interval":
+            return rng.integers(0, self.width + 1, size)
+
+        return rng.integers(1, self.width + 1, size)
+
+
+def syntheticVariables(nVariables, rangeWidth=10, filterDepth=3, prefix="V"):
+    """creates the variables of a synthetic programing template. Variables form filter chains of filterDepth
+    filter follow questions, each filtered by the previous variable of the chain. Range conditions cycle through
+    value ranges, value lists and intervals.
+
+    Args:
+        nVariables (int): number of variables
+        rangeWidth (int): number of allowed values per variable
+        filterDepth (int): length of the filter chains, 0 for no filters
+        prefix (string): prefix of the variable names
+
+    Returns:
+        list: syntheticVariable for each variable
+    """
+    variables = []
+    for position in range(nVariables):
+        kind = ("range", "list", "range", "interval")[position % 4]
+        width = rangeWidth * 1000 if kind == "interval" else rangeWidth
+        parent = variables[-1] if filterDepth > 0 and position % (filterDepth + 1) != 0 else None
+        variables.append(syntheticVariable(f"{prefix}{position}", kind, width, parent))
+
+    return variables
+
+
+def templateLines(variables, missingValue=-95, filterMissVal=-55):
+    """variable lines of the programing template, e.g. 'V1 == 1-10 + -95, -55; V0 == 1-5'
+
+    Args:
+        variables (list): syntheticVariable for each variable
+        missingValue (int): missing code of all variables
+        filterMissVal (int): missing code of filter follow questions not asked
+
+    Returns:
+        list: one line per variable
+    """
+    lines = []
+    for variable in variables:
+        if variable.parent is None:
+            lines.append(variable.rangeCondition([missingValue]))
+        else:
+            rangeCondition = variable.rangeCondition([missingValue, filterMissVal])
+            lines.append(f"{rangeCondition}; {variable.parent.routingCondition()}")
+
+    return lines
+
+
+def templateText(lines, linesPerBlock=1):
+    """text of a programing template as read by the parser, one (Va: ... Vb:) block per question
+
+    Args:
+        lines (list): variable lines
+        linesPerBlock (int): variable lines per question block
+
+    Returns:
+        list: question blocks
+    """
+    return [
+        "(Va:\n" + "\n".join(lines[start : start + linesPerBlock]) + f"\nVb: 'question {start}')"
+        for start in range(0, len(lines), linesPerBlock)
+    ]
+
+
+def writeTemplateDocx(lines, path, tableShare=0.5, linesPerBlock=1):
+    """writes a programing template as Word document, the first question blocks in a table, the rest as paragraphs
+
+    Args:
+        lines (list): variable lines
+        path (string or Path): path of the document
+        tableShare (float): share of question blocks written into the table
+        linesPerBlock (int): variable lines per question block
+    """
+    blocks = templateText(lines, linesPerBlock)
+    tableBlocks = int(len(blocks) * tableShare)
+
+    document = docx.Document()
+    document.add_paragraph("Synthetic programing template")
+    if tableBlocks > 0:
+        table = document.add_table(rows=tableBlocks, cols=2)
+        for row, block in zip(table.rows, blocks[:tableBlocks]):
+            row.cells[0].text = "Question"
+            row.cells[1].text = block
+    for block in blocks[tableBlocks:]:
+        document.add_paragraph(block)
+    document.save(path)
+
+
+def surveyData(variables, nRows, violationRate=0.001, missingValue=-95, filterMissVal=-55, missingRate=0.01, seed=0):
+    """creates survey data matching a synthetic template, with injected range and filter violations
+
+    Args:
+        variables (list): syntheticVariable for each variable
+        nRows (int): number of respondents
+        violationRate (float): share of rows with a violation per variable and violation type
+        missingValue (int): missing code of all variables
+        filterMissVal (int): missing code of filter follow questions not asked
+        missingRate (float): share of missingValue answers
+        seed (int): seed of the random number generator
+
+    Returns:
+        pd.DataFrame: one column per variable
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    asked = {}
+    for variable in variables:
+        values = variable.allowedValues(rng, nRows)
+        values[rng.random(nRows) < missingRate] = missingValue
+
+        if variable.parent is None:
+            isAsked = np.ones(nRows, dtype=bool)
+        else:
+            isAsked = asked[variable.parent.name] & variable.parent.routed(columns[variable.parent.name])
+            values[~isAsked] = filterMissVal
+
+            # answers although not asked (filterCheck unallowed) and no answer although asked (filterCheck missing)
+            notAsked = np.flatnonzero(~isAsked)
+            values[rng.choice(notAsked, int(len(notAsked) * violationRate), replace=False)] = 1
+            askedRows = np.flatnonzero(isAsked)
+            values[rng.choice(askedRows, int(len(askedRows) * violationRate), replace=False)] = filterMissVal
+
+        # values outside the range (rangeCheck unallowed)
+        values[rng.random(nRows) < violationRate] = variable.width + 7
+
+        asked[variable.name] = isAsked
+        columns[variable.name] = values
+
+    return pd.DataFrame(columns)
@@ -1,2 +1,4 @@
+__version__ = "0.1.0"
+
 from .helper import docReader, parser
-from . import surveychecks
\ No newline at end of file
+from . import surveychecks
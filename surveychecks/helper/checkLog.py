@@ -0,0 +1,58 @@
+import logging
+
+
+class checkLog:
+    """Output of the checks. Messages are printed, or passed to a logging.Logger in batch runs, and only formatted
+    if they are emitted at the chosen verbosity. Messages use %-style arguments like logging.
+
+    Verbosity:
+        "findings": every inconsistency found and the summary of each check
+        "summary": only the summary line of each check and warnings about the template
+        "quiet": nothing
+
+    Args:
+        verbosity (string): "findings", "summary" or "quiet", defaults to "findings" when printing and to
+            "summary" when a logger is given
+        logger (logging.Logger): logger receiving the messages (summaries and findings as INFO, warnings as WARNING),
+            None to print them
+    """
+
+    levels = {"quiet": 0, "summary": 1, "findings": 2}
+
+    def __init__(self, verbosity=None, logger=None):
+        if verbosity is None:
+            verbosity = "findings" if logger is None else "summary"
+        if verbosity not in self.levels:
+            raise Exception('verbosity not recognized -> only "findings", "summary" and "quiet" are available')
+
+        self.verbosity = verbosity
+        self.level = self.levels[verbosity]
+        self.logger = logger
+
+    def __repr__(self):
+        return f"checkLog({self.verbosity!r}, logger={self.logger!r})"
+
+    def emit(self, level, logLevel, message, args):
+        if self.level < level:
+            return
+        if self.logger is None:
+            print(message % args if args else message)
+        else:
+            self.logger.log(logLevel, message, *args)
+
+    def finding(self, message, *args):
+        """a single inconsistency"""
+        self.emit(2, logging.INFO, message, args)
+
+    def summary(self, message, *args):
+        """the result of a whole check"""
+        self.emit(1, logging.INFO, message, args)
+
+    def warning(self, message, *args):
+        """a problem of the programing template"""
+        self.emit(1, logging.WARNING, message, args)
+
+    @property
+    def findings(self):
+        """whether single inconsistencies are emitted"""
+        return self.level >= 2
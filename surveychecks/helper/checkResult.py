@@ -0,0 +1,79 @@
+from surveychecks.helper.typedColumns import restoreMissing
+
+
+class checkResult:
+    """Result of a range or filter check of one variable. Only the row mask of the check and the positions of the
+    violating rows are stored, data frame views are created when asked for. For compatibility the result can be
+    indexed like the lists returned before:
+        [0] = question
+        [1] = range or filter condition
+        [2] = data frame of the question (and filter questions) for the selected rows, sorted
+        [3] = full data frame for the selected rows
+
+    Args:
+        variable (string): checked variable
+        condition (string): range or filter condition
+        dataframe (pd.DataFrame): checked data, not copied
+        mask (np.ndarray): boolean mask of the condition
+        invert (bool): whether the selected rows are the rows where the condition is False
+        violations (np.ndarray): positions of the violating rows
+        sortBy (list): variables to sort the views by, None for range checks
+        naPosition (string): position of missing values when sorting ("first" or "last")
+    """
+
+    __slots__ = ("variable", "condition", "dataframe", "mask", "invert", "violations", "sortBy", "naPosition")
+
+    def __init__(self, variable, condition, dataframe, mask, invert, violations, sortBy=None, naPosition="last"):
+        self.variable = variable
+        self.condition = condition
+        self.dataframe = dataframe
+        self.mask = mask
+        self.invert = invert
+        self.violations = violations
+        self.sortBy = sortBy
+        self.naPosition = naPosition
+
+    def __repr__(self):
+        return f"checkResult({self.variable!r}, count={self.count})"
+
+    def __len__(self):
+        return 4
+
+    def __getitem__(self, index):
+        getters = (lambda: self.variable, lambda: self.condition, self.variableFrame, self.frame)
+        if isinstance(index, slice):
+            return [getter() for getter in getters[index]]
+
+        return getters[index]()
+
+    def __iter__(self):
+        yield self.variable
+        yield self.condition
+        yield self.variableFrame()
+        yield self.frame()
+
+    @property
+    def count(self):
+        """number of violating rows"""
+        return len(self.violations)
+
+    def selection(self):
+        """boolean mask of the rows selected by the check"""
+        return ~self.mask if self.invert else self.mask
+
+    def frame(self):
+        """full data frame for the selected rows, sorted by the relevant variables for filter checks"""
+        out = restoreMissing(self.dataframe[self.selection()])
+        if self.sortBy is not None:
+            out = out.sort_values(by=self.sortBy)
+
+        return out
+
+    def variableFrame(self):
+        """data of the question (range checks) or of the question and its filter questions (filter checks) for the
+        selected rows, sorted"""
+        out = restoreMissing(self.dataframe[self.selection()])
+        if self.sortBy is None:
+            return out[self.variable].sort_values()
+
+        return out[self.sortBy].sort_values(by=self.sortBy, na_position=self.naPosition)
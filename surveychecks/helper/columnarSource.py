@@ -0,0 +1,74 @@
+from pathlib import Path
+
+# file formats by suffix
+columnarFormats = {
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+}
+
+
+def isColumnarFile(path):
+    """whether a path names an Arrow (IPC / Feather V2) or Parquet file"""
+    return isinstance(path, (str, Path)) and Path(path).suffix.lower() in columnarFormats
+
+
+class columnarSource:
+    """Arrow (IPC / Feather V2) or Parquet file read through a memory map. Opening the file only reads its schema,
+    the values of a column are read when the column is loaded. Arrow files are not copied into memory until
+    they are converted to pandas, Parquet files are decoded for the loaded columns only.
+
+    Needs pyarrow, which is not installed with surveychecks.
+
+    Args:
+        path (string or Path): path of the file
+        fileFormat (string): "arrow" or "parquet", inferred from the suffix of the path if None
+
+    Attributes:
+        columns (list): names of all columns of the file
+    """
+
+    def __init__(self, path, fileFormat=None):
+        self.path = Path(path)
+        if fileFormat is None:
+            fileFormat = columnarFormats.get(self.path.suffix.lower())
+        if fileFormat not in ("arrow", "parquet"):
+            raise Exception(f'file format of "{self.path}" not recognized -> only Arrow/Feather and Parquet files')
+
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise Exception("reading Arrow/Feather and Parquet files needs pyarrow -> pip install pyarrow")
+
+        self.fileFormat = fileFormat
+        if fileFormat == "arrow":
+            self.reader = pa.ipc.open_file(pa.memory_map(str(self.path), "r"))
+            self.columns = list(self.reader.schema.names)
+        else:
+            self.reader = pq.ParquetFile(str(self.path), memory_map=True)
+            self.columns = list(self.reader.schema_arrow.names)
+
+    def __repr__(self):
+        return f"columnarSource({str(self.path)!r}, {len(self.columns)} columns)"
+
+    def load(self, columns):
+        """reads some columns of the file into a data frame
+
+        Args:
+            columns (iterable): names of the columns, names not in the file are left out
+
+        Returns:
+            pd.DataFrame: loaded columns in the order of the file
+        """
+        requested = set(columns)
+        columns = [column for column in self.columns if column in requested]
+        if self.fileFormat == "arrow":
+            # the record batches point into the memory map, only the selected columns are converted
+            table = self.reader.read_all().select(columns)
+        else:
+            table = self.reader.read(columns=columns, use_pandas_metadata=True)
+
+        return table.to_pandas()
@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+
+from surveychecks.helper.typedColumns import missingSentinel
+
+
+class compiledRange:
+    """Compiled representation of a variable range condition, e.g. 'age == 18-105 + -95'
+
+    Instead of expanding a range into one '==' comparison per value, the condition is kept as
+    discrete values, interval bounds and missing codes, so that it can be checked with a single
+    vectorized pass over a column.
+
+    Attributes:
+        variable (string): name of the variable the range belongs to
+        values (tuple): discrete allowed values
+        intervals (tuple): (lower, upper, lowerInclusive, upperInclusive, integral) bounds of allowed values
+        missings (tuple): missing value codes added with '+'
+    """
+
+    __slots__ = ("variable", "values", "intervals", "missings")
+
+    def __init__(self, variable, values=(), intervals=(), missings=()):
+        self.variable = variable
+        self.values = tuple(values)
+        self.intervals = tuple(intervals)
+        self.missings = tuple(missings)
+
+    def __repr__(self):
+        return (
+            f"compiledRange({self.variable!r}, values={self.values}, intervals={self.intervals}, "
+            f"missings={self.missings})"
+        )
+
+    def allowedValues(self):
+        """all discrete values of the range including missing codes
+
+        Returns:
+            tuple: discrete values in order of declaration
+        """
+        return tuple(dict.fromkeys(self.values + self.missings))
+
+    def supports(self, series):
+        """whether the compiled range can be evaluated on a column without falling back to pd.eval
+
+        Args:
+            series (pd.Series): column of the data frame
+
+        Returns:
+            bool: True for numeric (non boolean) columns
+        """
+        return pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype)
+
+    def allowedMask(self, series):
+        """evaluates the range on a column in one vectorized pass
+
+        Args:
+            series (pd.Series): numeric column of the data frame
+
+        Returns:
+            np.ndarray: boolean array, True where the value is allowed by the range condition
+        """
+        values = columnValues(series)
+        mask = np.isin(values, self.allowedValues())
+        for interval in self.intervals:
+            mask |= intervalMask(values, interval)
+        sentinel = missingSentinel(series)
+        if sentinel is not None:
+            # missing values of compacted columns are never allowed, like NaN
+            mask &= values != sentinel
+
+        return mask
+
+    def allowedBlock(self, block, missing):
+        """evaluates the range on the items of a grid sharing this range, all columns at once
+
+        Args:
+            block (np.ndarray): numeric values, one column per item
+            missing (np.ndarray): boolean array of the same shape, True where a value is missing
+
+        Returns:
+            np.ndarray: boolean array of the same shape, True where the value is allowed by the range condition
+        """
+        mask = np.isin(block, self.allowedValues())
+        for interval in self.intervals:
+            mask |= intervalMask(block, interval)
+        mask &= ~missing
+
+        return mask
+
+    def findValues(self, series):
+        """looks up which declared values of the range occur in a column, based on the set of observed values
+        instead of evaluating every value seperately. Integer ranges (e.g. 18-105) count as one value per integer,
+        bounded conditions (e.g. income >= 0 & income <= 500000) as one value.
+
+        Args:
+            series (pd.Series): numeric column of the data frame
+
+        Returns:
+            tuple:
+                [0] list of values (as strings) that were not found
+                [1] list of values (as strings) that were found
+        """
+        observed = pd.unique(columnValues(series))
+        sentinel = missingSentinel(series)
+        if sentinel is not None:
+            observed = observed[observed != sentinel]
+        valueNotFoundList = []
+        valueFoundList = []
+
+        for interval in self.intervals:
+            lower, upper, lowerInclusive, upperInclusive, integral = interval
+            if integral:
+                declared = np.arange(lower, upper + 1)
+                present = np.isin(declared, observed)
+                valueNotFoundList += [str(value) for value in declared[~present]]
+                valueFoundList += [str(value) for value in declared[present]]
+            else:
+                label = intervalLabel(interval)
+                if intervalMask(observed, interval).any():
+                    valueFoundList.append(label)
+                else:
+                    valueNotFoundList.append(label)
+
+        declared = self.allowedValues()
+        present = np.isin(declared, observed)
+        for value, isPresent in zip(declared, present):
+            if isPresent:
+                valueFoundList.append(str(value))
+            else:
+                valueNotFoundList.append(str(value))
+
+        return valueNotFoundList, valueFoundList
+
+
+def intervalMask(values, interval):
+    """evaluates a single interval of a compiled range on an array
+
+    Args:
+        values (np.ndarray): numeric values, 1-D or 2-D
+        interval (tuple): (lower, upper, lowerInclusive, upperInclusive, integral)
+
+    Returns:
+        np.ndarray: boolean array, True where the value lies within the interval
+    """
+    lower, upper, lowerInclusive, upperInclusive, integral = interval
+    mask = np.ones(values.shape, dtype=bool)
+    if lower is not None:
+        mask &= values >= lower if lowerInclusive else values > lower
+    if upper is not None:
+        mask &= values <= upper if upperInclusive else values < upper
+    if integral and values.dtype.kind == "f":
+        mask &= np.floor(values) == values
+
+    return mask
+
+
+def intervalLabel(interval):
+    """readable form of an interval, e.g. '0-500000' or '>=18'"""
+    lower, upper, lowerInclusive, upperInclusive, integral = interval
+    if lower is not None and upper is not None:
+        return f"{lower}-{upper}"
+    elif lower is not None:
+        return f"{'>=' if lowerInclusive else '>'}{lower}"
+    else:
+        return f"{'<=' if upperInclusive else '<'}{upper}"
+
+
+def columnValues(series):
+    """gives the values of a numeric column as a numpy array, mapping pandas NA to NaN
+
+    Args:
+        series (pd.Series): numeric column
+
+    Returns:
+        np.ndarray: column values
+    """
+    if pd.api.types.is_extension_array_dtype(series.dtype):
+        return series.to_numpy(dtype="float64", na_value=np.nan)
+    return series.to_numpy()
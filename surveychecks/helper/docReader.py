@@ -1,43 +1,65 @@
 import docx
+from docx.table import _Cell
 from pathlib import Path
 
 
 class docReader:
+    """Reads the text of a word document, opening the document only once
+
+    Args:
+        wordDocumentPath (string or Path): Word document with variable ranges and filtercondition
+        infoIn (string): which parts of the document to read, "table", "body" or "all"
+    """
+
     def __init__(self, wordDocumentPath, infoIn="all"):
+        if infoIn not in ("all", "table", "body"):
+            raise Exception('infoIn not recognized -> only "all", "table" and "body" are available')
+
         self.wordDocument = Path(wordDocumentPath)
-        self.text = ""
-        self.readTableText()
-        self.readBodyText()
+        self.infoIn = infoIn
+        self.document = None
+        self.text = None
 
-    def readBodyText(self):
-        """Get text from a word document main body
+    def loadDocument(self):
+        """Opens the word document on first use
 
-        Sets self.tableText:
-            string: all text
+        Returns:
+            docx.Document: the parsed document
         """
-        doc = docx.Document(self.wordDocument)
-        fullText = []
-        for para in doc.paragraphs:
-            fullText.append(para.text)
+        if self.document is None:
+            self.document = docx.Document(self.wordDocument)
 
-        self.text += "\n".join(fullText)
+        return self.document
 
-    def readTableText(self):
-        """Get text from a word document table body
+    def iterBodyText(self):
+        """Yields the text of the word document main body paragraph by paragraph"""
+        for para in self.loadDocument().paragraphs:
+            yield para.text
 
-        Uses:
-            self.wordDocument (docx): Word document with variable ranges and filtercondition
+    def iterTableText(self):
+        """Yields the text of the word document tables cell by cell
 
-        Sets self.tableText:
-            string: all text from tables
+        Walks the cell elements of each row directly instead of using row.cells, which resolves merged cells
+        for every row and is slow on large tables. Merged cells are therefore read once.
         """
-        doc = docx.Document(self.wordDocument)
-        fullText = []
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    fullText.append(cell.text)
-        self.text += "\n".join(fullText)
+        for table in self.loadDocument().tables:
+            for row in table._tbl.tr_lst:
+                for cell in row.tc_lst:
+                    yield _Cell(cell, table).text
+
+    def iterText(self):
+        """Yields the text of the parts of the document selected by infoIn, tables first
+
+        Returns:
+            generator: strings of single table cells and paragraphs
+        """
+        if self.infoIn in ("all", "table"):
+            yield from self.iterTableText()
+        if self.infoIn in ("all", "body"):
+            yield from self.iterBodyText()
 
     def getText(self):
+        if self.text is None:
+            self.text = "\n".join(self.iterText())
+
         return self.text
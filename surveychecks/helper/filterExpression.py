@@ -0,0 +1,286 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from surveychecks.helper.compiledRange import columnValues
+from surveychecks.helper.typedColumns import missingSentinel
+
+# numpy functions of the comparison operators
+comparisonFunctions = {
+    "==": np.equal,
+    "!=": np.not_equal,
+    ">=": np.greater_equal,
+    "<=": np.less_equal,
+    ">": np.greater,
+    "<": np.less,
+}
+
+
+def isNumeric(series):
+    return pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype)
+
+
+class comparison:
+    """leaf of a filter expression, e.g. 'SD27 == 2'
+
+    Attributes:
+        variable (string): name of the compared variable
+        operator (string): one of ==, !=, >=, <=, >, <
+        value (int, float or string): value the variable is compared with
+        key (string): canonical form of the expression, used for memoizing masks
+    """
+
+    __slots__ = ("variable", "operator", "value", "key")
+
+    def __init__(self, variable, operator, value):
+        self.variable = variable
+        self.operator = operator
+        self.value = value
+        self.key = f"{variable} {operator} {value!r}"
+
+    def __str__(self):
+        return self.key
+
+    def __repr__(self):
+        return f"comparison({self.key!r})"
+
+    def variables(self):
+        return [self.variable]
+
+    def evaluate(self, dataframe, cache):
+        series = dataframe[self.variable]
+        if isNumeric(series) and not isinstance(self.value, str):
+            # NaN compares like in pandas: only != evaluates to True
+            values = columnValues(series)
+            result = comparisonFunctions[self.operator](values, self.value)
+            sentinel = missingSentinel(series)
+            if sentinel is not None:
+                # the sentinel of a compacted column stands for NaN
+                result[values == sentinel] = self.operator == "!="
+            if pd.api.types.is_extension_array_dtype(series.dtype):
+                # NA of nullable columns satisfies no comparison, like the NA rows dropped by boolean indexing
+                result[series.isna().to_numpy()] = False
+            return result
+
+        if isinstance(series.dtype, pd.CategoricalDtype) and self.operator not in ("==", "!="):
+            # unordered categories of compacted text columns cannot be ordered, the values can
+            series = series.astype(object)
+        if self.operator == "==":
+            result = series == self.value
+        elif self.operator == "!=":
+            result = series != self.value
+        elif self.operator == ">=":
+            result = series >= self.value
+        elif self.operator == "<=":
+            result = series <= self.value
+        elif self.operator == ">":
+            result = series > self.value
+        else:
+            result = series < self.value
+
+        # NA of nullable columns satisfies no comparison, like the NA rows dropped by boolean indexing
+        return result.to_numpy(dtype=bool, na_value=False)
+
+
+class membership:
+    """set membership test standing in for equality comparisons of one variable joined by |,
+    e.g. 'SD26 == 1 | SD26 == 2 | SD26 == 3' is evaluated as one isin
+
+    Attributes:
+        variable (string): name of the variable
+        values (tuple): values of the comparisons
+        key (string): canonical form, used for memoizing masks
+    """
+
+    __slots__ = ("variable", "values", "key")
+
+    def __init__(self, variable, values):
+        self.variable = variable
+        self.values = tuple(values)
+        self.key = f"{variable} in {self.values!r}"
+
+    def variables(self):
+        return [self.variable]
+
+    def evaluate(self, dataframe, cache):
+        series = dataframe[self.variable]
+        if isNumeric(series):
+            values = columnValues(series)
+            result = np.isin(values, self.values)
+            sentinel = missingSentinel(series)
+            if sentinel is not None:
+                result &= values != sentinel
+            return result
+
+        return series.isin(self.values).to_numpy(dtype=bool, na_value=False)
+
+
+class logical:
+    """inner node of a filter expression joining its children with & or |
+
+    Attributes:
+        operator (string): '&' or '|'
+        children (tuple): comparison or logical nodes
+        key (string): canonical form of the expression, used for memoizing masks
+    """
+
+    __slots__ = ("operator", "children", "key")
+
+    def __init__(self, operator, children):
+        self.operator = operator
+        # flattening nested nodes of the same operator, (a & b) & c -> a & b & c
+        flatChildren = []
+        for child in children:
+            if isinstance(child, logical) and child.operator == operator:
+                flatChildren += child.children
+            else:
+                flatChildren.append(child)
+        self.children = tuple(flatChildren)
+        self.key = "(" + f" {operator} ".join(child.key for child in self.children) + ")"
+
+    def __str__(self):
+        return self.key
+
+    def __repr__(self):
+        return f"logical({self.key!r})"
+
+    def variables(self):
+        varlist = []
+        for child in self.children:
+            varlist += child.variables()
+
+        return list(dict.fromkeys(varlist))
+
+    def evaluate(self, dataframe, cache):
+        children = self.children
+        masks = []
+        if self.operator == "|":
+            # equality comparisons of the same variable are evaluated as one set membership test
+            equalities = OrderedDict()
+            children = []
+            for child in self.children:
+                if isinstance(child, comparison) and child.operator == "==" and not isinstance(child.value, str):
+                    equalities.setdefault(child.variable, []).append(child)
+                else:
+                    children.append(child)
+            for variable, group in equalities.items():
+                if len(group) == 1:
+                    children += group
+                else:
+                    masks.append(cache.mask(membership(variable, [child.value for child in group])))
+
+        masks += [cache.mask(child) for child in children]
+        if self.operator == "&":
+            return np.logical_and.reduce(masks)
+        else:
+            return np.logical_or.reduce(masks)
+
+
+def variableGroups(expression):
+    """groups the children of a logical node that refer to a single variable, keeping the position of the first one
+
+    Args:
+        expression (logical): filter condition
+
+    Returns:
+        list: one expression per group, children of the same variable joined with the operator of the node
+    """
+    groups = OrderedDict()
+    for child in expression.children:
+        childVariables = child.variables()
+        groupKey = childVariables[0] if len(childVariables) == 1 else id(child)
+        groups.setdefault(groupKey, []).append(child)
+
+    return [group[0] if len(group) == 1 else logical(expression.operator, group) for group in groups.values()]
+
+
+class routedCondition:
+    """expanded filter condition of a filter follow question, evaluated from its own filter condition and the
+    masks of the rows its filter variables are routed to instead of from the expanded string. Each comparison of
+    a filter variable is joined (&) with the routed mask of that variable, like parser.substituteExpanded does
+    with the expanded conditions, so the mask equals the mask of the expanded condition. Evaluated in topological
+    order each routed mask is computed once from the cached masks of its filter variables, whatever the depth
+    of the filter chain.
+
+    Attributes:
+        variable (string): filter follow question
+        expression (comparison or logical): filter condition of the variable, not expanded
+        routed (dictionary): routedCondition of the filter variables by name
+        key (string): key of the routed mask in the maskCache
+    """
+
+    __slots__ = ("variable", "expression", "routed", "key")
+
+    def __init__(self, variable, expression, routed):
+        self.variable = variable
+        self.expression = expression
+        self.routed = routed
+        self.key = f"routed({variable})"
+
+    def __repr__(self):
+        return f"routedCondition({self.variable!r}, {self.expression.key!r})"
+
+    def variables(self):
+        return self.expression.variables()
+
+    def evaluate(self, dataframe, cache):
+        return self.routedMask(self.expression, cache)
+
+    def routedMask(self, expression, cache):
+        variables = expression.variables()
+        if len(variables) == 1:
+            mask = cache.mask(expression)
+            if variables[0] in self.routed:
+                mask = mask & cache.mask(self.routed[variables[0]])
+            return mask
+
+        masks = [self.routedMask(group, cache) for group in variableGroups(expression)]
+        if expression.operator == "&":
+            return np.logical_and.reduce(masks)
+        else:
+            return np.logical_or.reduce(masks)
+
+
+class maskCache:
+    """memoizes boolean masks of filter expressions for one data frame, such that a sub-expression shared by
+    several filter conditions (e.g. 'SD27 == 2') is only evaluated once. The cache can be shared between threads,
+    a mask requested concurrently may be computed twice but is stored once.
+
+    Args:
+        dataframe (pd.DataFrame): data the expressions are evaluated on
+        maxEntries (int): maximum number of masks kept, least recently used masks are dropped first
+    """
+
+    def __init__(self, dataframe, maxEntries=None):
+        self.dataframe = dataframe
+        self.maxEntries = maxEntries
+        self.masks = OrderedDict()
+        self.lock = threading.Lock()
+
+    def mask(self, expression):
+        """gives the boolean mask of an expression, evaluating it (and its sub-expressions) only if not cached
+
+        Args:
+            expression (comparison or logical): parsed filter expression
+
+        Returns:
+            np.ndarray: boolean mask over the rows of the data frame
+        """
+        with self.lock:
+            if expression.key in self.masks:
+                self.masks.move_to_end(expression.key)
+                return self.masks[expression.key]
+
+        mask = expression.evaluate(self.dataframe, self)
+        with self.lock:
+            self.masks[expression.key] = mask
+            if self.maxEntries is not None and len(self.masks) > self.maxEntries:
+                self.masks.popitem(last=False)
+
+        return mask
+
+    def clear(self):
+        with self.lock:
+            self.masks.clear()
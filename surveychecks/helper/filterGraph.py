@@ -0,0 +1,138 @@
+from collections import OrderedDict, deque
+
+
+class filterGraph:
+    """directed graph of filter dependencies, with an edge from each filter follow question to every variable
+    used in its filter condition
+
+    Args:
+        edges (OrderedDict): filter follow question as key, list of filter variables as value
+
+    Attributes:
+        order (list): variables in topological order, filter variables before their filter follow questions
+        cycles (list): filter cycles found in the graph, each a list of variables e.g. ['A', 'B', 'A']
+    """
+
+    def __init__(self, edges):
+        self.edges = OrderedDict((key, list(dict.fromkeys(value))) for key, value in edges.items())
+        self.order, self.cycles = self.topologicalOrder()
+        self.ancestorCache = self.collectAncestors()
+
+    def parents(self, variable):
+        """variables used in the filter condition of a variable"""
+        return self.edges.get(variable, [])
+
+    def nodes(self):
+        """all variables of the graph, filter follow questions first, in order of appearance"""
+        nodes = OrderedDict.fromkeys(self.edges)
+        for parents in self.edges.values():
+            nodes.update(OrderedDict.fromkeys(parents))
+
+        return list(nodes)
+
+    def topologicalOrder(self):
+        """sorts the graph such that every variable comes after all variables of its filter condition (Kahn)
+
+        Returns:
+            list:
+                [0] variables in topological order, variables on a filter cycle are left out
+                [1] filter cycles as lists of variables
+        """
+        nodes = self.nodes()
+        children = {node: [] for node in nodes}
+        unresolvedParents = {}
+        for node in nodes:
+            parents = self.parents(node)
+            unresolvedParents[node] = len(parents)
+            for parent in parents:
+                children[parent].append(node)
+
+        queue = deque(node for node in nodes if unresolvedParents[node] == 0)
+        order = []
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for child in children[node]:
+                unresolvedParents[child] -= 1
+                if unresolvedParents[child] == 0:
+                    queue.append(child)
+
+        remaining = [node for node in nodes if unresolvedParents[node] > 0]
+
+        return order, self.findCycles(remaining)
+
+    def findCycles(self, remaining):
+        """finds one cycle per strongly connected group of the variables left over by the topological sort
+
+        Args:
+            remaining (list): variables that are on or depend on a filter cycle
+
+        Returns:
+            list: filter cycles as lists of variables, first variable repeated at the end
+        """
+        cycles = []
+        onCycle = set()
+        remainingSet = set(remaining)
+        for start in remaining:
+            if start in onCycle:
+                continue
+            # walking along unresolved filter variables until a variable repeats
+            path = [start]
+            position = {start: 0}
+            node = start
+            while True:
+                node = next(parent for parent in self.parents(node) if parent in remainingSet)
+                if node in position:
+                    cycle = path[position[node] :] + [node]
+                    if not onCycle.intersection(cycle):
+                        cycles.append(cycle)
+                    onCycle.update(cycle)
+                    break
+                if node in onCycle:
+                    break
+                position[node] = len(path)
+                path.append(node)
+
+        return cycles
+
+    def collectAncestors(self):
+        """collects the ancestors of all variables in topological order, such that each variable reuses the
+        already collected ancestors of its filter variables
+
+        Returns:
+            dict: variable as key, list of ancestors as value
+        """
+        ancestorCache = {}
+        for node in self.order:
+            ancestorList = OrderedDict.fromkeys(self.parents(node))
+            for parent in self.parents(node):
+                ancestorList.update(OrderedDict.fromkeys(ancestorCache[parent]))
+            ancestorCache[node] = list(ancestorList)
+
+        return ancestorCache
+
+    def ancestors(self, variable):
+        """all variables a variable depends on through its filter condition and the filter conditions of those
+        variables, direct filter variables first
+
+        Args:
+            variable (string): filter follow question
+
+        Returns:
+            list: filter variables
+        """
+        if variable in self.ancestorCache:
+            return self.ancestorCache[variable]
+
+        # variables on or behind a filter cycle, collected by breadth first search
+        ancestorList = OrderedDict()
+        queue = deque(self.parents(variable))
+        while queue:
+            node = queue.popleft()
+            if node in ancestorList:
+                continue
+            ancestorList[node] = None
+            queue.extend(self.parents(node))
+        self.ancestorCache[variable] = list(ancestorList)
+
+        return self.ancestorCache[variable]
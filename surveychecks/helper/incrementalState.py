@@ -0,0 +1,131 @@
+from collections import Counter, OrderedDict
+
+import pandas as pd
+
+
+class incrementalState:
+    """Running results of surveychecks.incrementalCheck between data deliveries, keyed by a respondent ID column.
+    Per variable the IDs of violating respondents and the counts of observed values are kept, such that rows that
+    were checked before only need to be checked again if they changed. The state can be pickled to keep it between
+    runs.
+
+    Args:
+        idColumn (string): column identifying respondents
+        filterMissVal (int): value of filter missings, filter checks are skipped if None
+        expandedCheck (bool): whether the expanded filter conditions are used
+
+    Attributes:
+        rowHashes (pd.Series): hash of each checked row, indexed by respondent ID
+        values (pd.DataFrame): values of the range variables of each checked row, indexed by respondent ID
+        valueCounts (dictionary): variable as keys and Counter of observed values as values
+        violations (dictionary): check name as keys and dictionaries of variable -> set of violating IDs as values
+        conditions (dictionary): check name as keys and dictionaries of variable -> condition as values
+        missing (list): [question, range condition, values not found] of failed rangeCheck(missing)
+    """
+
+    checkNames = ("rangeCheck(unallowed)", "filterCheck(unallowed)", "filterCheck(missing)")
+
+    def __init__(self, idColumn, filterMissVal=None, expandedCheck=False):
+        self.idColumn = idColumn
+        self.filterMissVal = filterMissVal
+        self.expandedCheck = expandedCheck
+        self.rowHashes = pd.Series(dtype="uint64")
+        self.values = None
+        self.valueCounts = {}
+        self.violations = OrderedDict((checkName, OrderedDict()) for checkName in self.checkNames)
+        self.conditions = OrderedDict((checkName, OrderedDict()) for checkName in self.checkNames)
+        self.missing = []
+
+    def __repr__(self):
+        return f"incrementalState({self.idColumn!r}, rows={len(self.rowHashes)})"
+
+    def delta(self, dataframe):
+        """compares a delivery with the rows checked before
+
+        Args:
+            dataframe (pd.DataFrame): full delivery including the ID column
+
+        Returns:
+            tuple:
+                [0] np.ndarray, boolean mask of the new or changed rows of dataframe
+                [1] pd.Index, IDs of rows checked before that changed or are no longer delivered
+                [2] pd.Series, hash of each row of dataframe indexed by respondent ID
+        """
+        if self.idColumn not in dataframe:
+            raise Exception(f'ID column "{self.idColumn}" not found in dataframe')
+        ids = pd.Index(dataframe[self.idColumn])
+        if ids.has_duplicates:
+            raise Exception(f'ID column "{self.idColumn}" has duplicated values: {list(ids[ids.duplicated()][:10])}')
+
+        hashes = pd.Series(pd.util.hash_pandas_object(dataframe, index=False).to_numpy(), index=ids)
+        # filling with 0 keeps the unsigned hashes exact, unknown IDs are marked separately
+        previous = self.rowHashes.reindex(ids, fill_value=0)
+        changed = ~ids.isin(self.rowHashes.index) | (previous != hashes).to_numpy()
+
+        stale = self.rowHashes.index.difference(ids[~changed])
+
+        return changed, stale, hashes
+
+    def discard(self, ids):
+        """removes rows from the running results, before they are checked again or because they were dropped
+
+        Args:
+            ids (pd.Index): respondent IDs
+        """
+        if len(ids) == 0:
+            return
+
+        for findings in self.violations.values():
+            for violatingIds in findings.values():
+                violatingIds.difference_update(ids)
+
+        if self.values is not None:
+            stale = self.values.loc[self.values.index.intersection(ids)]
+            for variable in stale:
+                self.valueCounts[variable].subtract(stale[variable].value_counts(dropna=True).to_dict())
+            self.values = self.values.drop(stale.index)
+
+    def add(self, deltaValues):
+        """adds the values of checked rows to the observed values
+
+        Args:
+            deltaValues (pd.DataFrame): values of the range variables, indexed by respondent ID
+        """
+        for variable in deltaValues:
+            self.valueCounts.setdefault(variable, Counter()).update(
+                deltaValues[variable].value_counts(dropna=True).to_dict()
+            )
+        self.values = deltaValues if self.values is None else pd.concat([self.values, deltaValues])
+
+    def addViolations(self, checkName, variable, condition, ids):
+        """adds the IDs of violating rows of one variable"""
+        self.conditions[checkName][variable] = condition
+        self.violations[checkName].setdefault(variable, set()).update(ids)
+
+    def observedValues(self, variable):
+        """values of a variable observed in at least one checked row"""
+        return pd.Series([value for value, count in self.valueCounts.get(variable, {}).items() if count > 0])
+
+    def results(self):
+        """failed checks over all rows checked so far
+
+        Returns:
+            dictionary: failed checks by check name
+                "rangeCheck(unallowed)": list of [question, range condition, sorted violating IDs]
+                "rangeCheck(missing)": list of [question, range condition, values not found]
+                "filterCheck(unallowed)": list of [question, filter condition, sorted violating IDs]
+                "filterCheck(missing)": list of [question, filter condition, sorted violating IDs]
+        """
+        out = OrderedDict()
+        for checkName, findings in self.violations.items():
+            if checkName.startswith("filterCheck") and self.filterMissVal is None:
+                continue
+            out[checkName] = [
+                [variable, self.conditions[checkName][variable], sorted(ids)]
+                for variable, ids in findings.items()
+                if len(ids) > 0
+            ]
+            if checkName == "rangeCheck(unallowed)":
+                out["rangeCheck(missing)"] = self.missing
+
+        return out
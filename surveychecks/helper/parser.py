@@ -1,50 +1,168 @@
 import re
 
+from surveychecks.helper.compiledRange import compiledRange
+from surveychecks.helper.filterExpression import comparison, logical, variableGroups
+from surveychecks.helper.variableLine import variableLine
+
+# tokens of a pandas evaluation string: parentheses, & and | or a single comparison such as 'SD27 == 2'
+regpatToken = re.compile(
+    r"""\s*(?:(?P<logic>[()&|])|(?P<variable>[A-Za-z_]\w*)\s*(?P<operator>[!=><]=|[><])\s*"""
+    r"""(?P<value>-?\d+(?:\.\d+)?(?![\w.])|'[^']*'|"[^"]*"))\s*"""
+)
+
+# regex patterns of the variable line syntax 'VAR == 1-5 + -9, -8; FILTER', compiled once on import
+# variable, range and missing codes of a range condition
+regpatRange = re.compile(
+    r"((\w*)\s[!=><]=\s([-]?[\d]*-(?=\,)[-]?[\d]*|([-]?[\d]*,?\s?)*))(\s\+\s(([-]?[\d]*,?\s?)*))?"
+)
+# missing codes after '+'
+regpatMiss = re.compile(r"(\w*)\s[!=><]=.*\+\s(([-]?[\d]*,?\s?)*)")
+regpatMissStrip = re.compile(r"\+(([-]?[\d]*,?\s?)*)")
+# ranges like 1-5
+regpatDashRange = re.compile(r"[-]?[\d]+-[-]?[\d]+")
+regpatDashBounds = re.compile(r"([-]?[\d]*)-([-]?[\d]*)")
+regpatIntRange = re.compile(r"\s*(-?\d+)\s*-\s*(-?\d+)\s*")
+regpatInteger = re.compile(r"\s*-?\d+\s*")
+# variables of an evaluation string and the parts of a single comparison
+regpatVarNames = re.compile(r"[(&|;]+\s*[(&|;]*(.*?)\s[!=><]=\s")
+regpatSingleExp = re.compile(r"(.*)[=!><]=(.*)")
+regpatComparison = re.compile(r"\s*(\w+)\s*([!=><]=|[><])\s*(.*?)\s*")
+
 
 class parser:
-    def __init__(self, text=""):
+    def __init__(self, text="", chunks=None):
         self.text = text
         self.varlist = ""
-        self.parseVarInfo()
+        # unique question blocks in order of appearance
+        self.varBlocks = []
+        # variableLine of each parsed line
+        self.parsedLines = {}
+        self.parseVarInfo(chunks)
 
-    def parseVarInfo(self):
+    def parseVarInfo(self, chunks=None):
         """Parses Text into a list of entries / a variable list
 
+        Args:
+            chunks (iterable): text in pieces (e.g. table cells and paragraphs), read instead of self.text
+
         Uses:
             self.text (string): information on variables, ranges and filter conditions
 
         Sets self.varlist:
             list: a list of rows, each element is a string containing information
             for one survey screen capturing everything between (Va: and Vb:)
+        Sets self.varBlocks:
+            list: text of each unique question block
         """
-        # regex pattern for extraction of relevant info between (Va: and Vb:)
-        regpatAll = re.compile(r"\(Va:(.*?)Vb:.*?\)", re.DOTALL)
+        if chunks is None:
+            chunks = [self.text]
 
-        # find all variable relevant Information
-        foundAll = regpatAll.findall(self.text)
+        # keep only unique question blocks by dic conversion
+        self.varBlocks = list(dict.fromkeys(self.iterVarBlocks(chunks)))
 
-        # keep only unique values by dic conversion and back to list
-        varlist = list(dict.fromkeys(foundAll))
+        varlist = []
+        for block in self.varBlocks:
+            varlist += self.blockLines(block)
 
-        # splitting each var regex by newline char
-        outlist = []
-        for var in varlist:
-            outlist.append(var.split("\n"))
+        self.varlist = varlist
 
-        # flattening list hirarchies
-        outlist = sum(outlist, [])
+    def blockLines(self, block):
+        """splits a question block by newline char and keeps only entries with == (e.g. no empty strings etc.)
 
-        # keeping only entries with == (e.g. empty strings etc.)
-        varlist = []
-        for var in outlist:
-            if re.search(r".*==.*", var) or re.search(r".*!=*", var):
-                varlist.append(var)
+        Args:
+            block (string): text of a question block
 
-        self.varlist = varlist
+        Returns:
+            list: variable lines of the block
+        """
+        return [var for var in block.split("\n") if "==" in var or "!" in var]
+
+    def iterVarBlocks(self, chunks):
+        """Yields the information between (Va: and Vb:) of every question block while reading text piece by piece,
+        only keeping the text of an unfinished question block in memory
+
+        Args:
+            chunks (iterable): pieces of text, joined by newline chars
+
+        Returns:
+            generator: strings of question blocks
+        """
+        buffer = ""
+        # offsets in buffer of the unfinished question block ("(Va:" and "Vb:", -1 if not found yet) and of the text
+        # not searched yet, such that every chunk is only searched once
+        start = closing = -1
+        searchFrom = 0
+        for chunk in chunks:
+            buffer += chunk + "\n"
+            while True:
+                if start == -1:
+                    start = buffer.find("(Va:", searchFrom)
+                    if start == -1:
+                        # keeping a possibly split "(Va:"
+                        searchFrom = max(len(buffer) - 3, 0)
+                        break
+                    searchFrom = start + 4
+                if closing == -1:
+                    closing = buffer.find("Vb:", searchFrom)
+                    if closing == -1:
+                        searchFrom = max(len(buffer) - 2, searchFrom)
+                        break
+                    searchFrom = closing + 3
+                end = buffer.find(")", searchFrom)
+                if end == -1:
+                    searchFrom = len(buffer)
+                    break
+
+                yield buffer[start + 4 : closing]
+                searchFrom = end + 1
+                start = closing = -1
+
+            # dropping text before an unfinished question block
+            keep = searchFrom if start == -1 else start
+            buffer = buffer[keep:]
+            searchFrom -= keep
+            if start != -1:
+                start -= keep
+            if closing != -1:
+                closing -= keep
 
     def getVarInfo(self):
         return self.varlist
 
+    def parseLine(self, line):
+        """parses a variable line such as 'VAR == 1-5 + -9, -8; FILTER' once into name, range condition, missing
+        codes and filter condition. Results are kept per line, such that range lists, variable names and filter
+        dictionaries are all built from the same parse.
+
+        Args:
+            line (string): variable line of the programing template
+
+        Returns:
+            variableLine: structured line
+        """
+        if line in self.parsedLines:
+            return self.parsedLines[line]
+
+        parts = line.split(";")
+        rangeCondition = parts[0]
+        filterCondition = None
+        if len(parts) == 2:
+            filterCondition = self.inputToFullString(parts[1].lstrip())
+
+        # the compiled range gives the name and the expansion from one tokenization of the range condition,
+        # conditions it cannot compile (e.g. text values or several variables) are expanded by the regex patterns
+        compiled, expandedRange = self.parseRange(rangeCondition)
+        if compiled is None:
+            name = self.inputToFullString(rangeCondition, out="variable")
+            expandedRange = self.inputToFullString(rangeCondition)
+        else:
+            name = compiled.variable
+
+        parsedLine = variableLine(line, name, rangeCondition, expandedRange, compiled, filterCondition)
+        self.parsedLines[line] = parsedLine
+
+        return parsedLine
+
     def expandRanges(self, matchObj):
         """expands ranges of a variable seperated by ',' or '-' to a full pandas evaluation string seperated by OR |
         intended for use inside a re.sub function within inputToFullString()
@@ -56,7 +174,7 @@ class parser:
             string: expanded range string
         """
         # expand comma
-        if matchObj.group(3) is not None and re.search(",", matchObj.group(3)):
+        if matchObj.group(3) is not None and "," in matchObj.group(3):
             expandedList = []
             tempList = matchObj.group(3).split(",")
             for count, value in enumerate(tempList):
@@ -64,10 +182,9 @@ class parser:
             return "(" + " | ".join(expandedList) + ")"
 
         # expand - ranges
-        elif matchObj.group(3) is not None and re.search("[-]?[\d]+-[-]?[\d]+", matchObj.group(3)):
+        elif matchObj.group(3) is not None and regpatDashRange.search(matchObj.group(3)):
             expandedList = []
-            parser = re.compile(r"([-]?[\d]*)-([-]?[\d]*)")
-            subMatch = re.search(parser, matchObj.group(3))
+            subMatch = regpatDashBounds.search(matchObj.group(3))
             for i in range(int(subMatch.group(1)), int(subMatch.group(2)) + 1):
                 expandedList.append(f"{matchObj.group(2)} == {i}")
 
@@ -85,7 +202,7 @@ class parser:
         Returns:
             string: with expanded missing values
         """
-        if matchObj.group(2) is not None and re.search(",", matchObj.group(2)):
+        if matchObj.group(2) is not None and "," in matchObj.group(2):
             expandedList = []
             tempList = matchObj.group(2).split(",")
             for count, value in enumerate(tempList):
@@ -95,7 +212,7 @@ class parser:
             return f"{matchObj.group(1)} == {matchObj.group(2)}"
 
     def createVarNameList(self, evalStr):
-        varlist = re.findall(r"[(&|;]+\s*[(&|;]*(.*?)\s[!=><]=\s", "|" + str(evalStr))  # filtering variables
+        varlist = regpatVarNames.findall("|" + str(evalStr))  # filtering variables
         varlist = list(dict.fromkeys(varlist))  # removing duplicates
 
         return varlist
@@ -111,28 +228,258 @@ class parser:
         Returns:
             string: expanded variable condition string or string with variable name
         """
-        # regex pattern for var and value extraction
-        regpat = re.compile(
-            r"((\w*)\s[!=><]=\s([-]?[\d]*-(?=\,)[-]?[\d]*|([-]?[\d]*,?\s?)*))(\s\+\s(([-]?[\d]*,?\s?)*))?"
-        )
-        regpatMiss = re.compile(r"(\w*)\s[!=><]=.*\+\s(([-]?[\d]*,?\s?)*)")
         if out == "expand":
-            strOut = re.sub(regpat, self.expandRanges, inputString)
-            if re.match(regpatMiss, inputString):
-                if re.search(regpatMiss, inputString).group(2) != "":
-                    strOut = re.sub(r"\+(([-]?[\d]*,?\s?)*)", "", strOut)
-                    return strOut + " | " + re.sub(regpatMiss, self.addMissings, inputString)
+            strOut = regpatRange.sub(self.expandRanges, inputString)
+            missMatch = regpatMiss.match(inputString)
+            if missMatch:
+                if missMatch.group(2) != "":
+                    strOut = regpatMissStrip.sub("", strOut)
+                    return strOut + " | " + regpatMiss.sub(self.addMissings, inputString)
             else:
                 return strOut
 
         elif out == "variable":
             try:
-                return regpat.findall(inputString)[0][1]
+                return regpatRange.search(inputString).group(2)
             except:
                 raise Exception(f'Problem parsing the following variable string: "{inputString}"')
         else:
             raise Exception('not an allowed "out" option, only "expand" and "variable" allowed')
 
+    def parseRange(self, inputString):
+        """tokenizes the range condition of a variable once into comparisons, giving the compiled range and the range
+        condition as pandas evaluation string. The compiled range holds discrete values, intervals and missing codes
+        instead of one '==' comparison per value, e.g.
+        'age == 18-105 + -95' -> interval 18 to 105 (integers only) and missing code -95
+        '(income >= 0 & income <= 500000) | income == -95, -55' -> interval 0 to 500000 and values -95, -55
+        'kid == 1, 2 + -55' -> values 1, 2, missing code -55 and '(kid == 1 | kid == 2) | kid == -55'
+
+        Args:
+            inputString (string): range condition of a variable (without filter condition)
+
+        Returns:
+            tuple:
+                [0] compiledRange, compiled range or None if the condition has to be evaluated with pd.eval
+                [1] string, expanded range condition, None if the condition could not be compiled
+        """
+        variable = None
+        values = []
+        intervals = []
+        missings = []
+        expandedTerms = []
+        for term in self.splitTopLevel(inputString.strip(), "|"):
+            term = self.stripParentheses(term)
+            comparisons = [self.splitComparison(comp) for comp in self.splitTopLevel(term, "&")]
+            if None in comparisons:
+                return None, None
+
+            termVariables = {comp[0] for comp in comparisons}
+            if len(termVariables) != 1 or (variable is not None and termVariables != {variable}):
+                return None, None
+            variable = comparisons[0][0]
+
+            if len(comparisons) == 1 and comparisons[0][1] == "==":
+                rangePart, _, missingPart = comparisons[0][2].partition("+")
+                rangeMatch = regpatIntRange.fullmatch(rangePart)
+                if rangeMatch:
+                    lower, upper = int(rangeMatch.group(1)), int(rangeMatch.group(2))
+                    intervals.append((lower, upper, True, True, True))
+                    expandedTerms.append(self.equalityString(variable, range(lower, upper + 1), True))
+                else:
+                    rangeValues = self.numberList(rangePart)
+                    if rangeValues is None:
+                        return None, None
+                    values += rangeValues
+                    expandedTerms.append(self.equalityString(variable, rangeValues))
+                if missingPart:
+                    missingValues = self.numberList(missingPart)
+                    if missingValues is None:
+                        return None, None
+                    missings += missingValues
+                    expandedTerms.append(self.equalityString(variable, missingValues))
+                continue
+
+            # conjunction of bounds, e.g. income >= 0 & income <= 500000
+            lower = upper = None
+            lowerInclusive = upperInclusive = True
+            bounds = []
+            for _, operator, value in comparisons:
+                bound = self.numberList(value)
+                if bound is None or len(bound) != 1:
+                    return None, None
+                if operator in (">=", ">") and lower is None:
+                    lower, lowerInclusive = bound[0], operator == ">="
+                elif operator in ("<=", "<") and upper is None:
+                    upper, upperInclusive = bound[0], operator == "<="
+                else:
+                    return None, None
+                bounds.append(f"{variable} {operator} {bound[0]}")
+            intervals.append((lower, upper, lowerInclusive, upperInclusive, False))
+            expandedTerms.append("(" + " & ".join(bounds) + ")")
+
+        if variable is None:
+            return None, None
+
+        return compiledRange(variable, values, intervals, missings), " | ".join(expandedTerms)
+
+    def equalityString(self, variable, values, enclose=False):
+        """joins equality comparisons of a variable with |, e.g. ('kid', [1, 2]) -> '(kid == 1 | kid == 2)'
+
+        Args:
+            variable (string): variable name
+            values (iterable): compared values
+            enclose (bool): whether to put a single comparison in parentheses as well
+
+        Returns:
+            string: pandas evaluation string
+        """
+        comparisons = [f"{variable} == {value}" for value in values]
+        if len(comparisons) == 1 and not enclose:
+            return comparisons[0]
+
+        return "(" + " | ".join(comparisons) + ")"
+
+    def splitTopLevel(self, evalString, separator):
+        """splits a string on a logical separator outside of parentheses
+
+        Args:
+            evalString (string): string to be split
+            separator (string): '&' or '|'
+
+        Returns:
+            list: parts of the string
+        """
+        parts = []
+        depth = 0
+        start = 0
+        for index, char in enumerate(evalString):
+            if char == "(":
+                depth += 1
+            elif char == ")":
+                depth -= 1
+            elif char == separator and depth == 0:
+                parts.append(evalString[start:index])
+                start = index + 1
+        parts.append(evalString[start:])
+
+        return [part.strip() for part in parts]
+
+    def stripParentheses(self, evalString):
+        """removes parentheses enclosing a whole expression, e.g. '(a == 1 | a == 2)' -> 'a == 1 | a == 2'"""
+        evalString = evalString.strip()
+        while evalString.startswith("(") and evalString.endswith(")"):
+            depth = 0
+            for index, char in enumerate(evalString):
+                depth += char == "("
+                depth -= char == ")"
+                if depth == 0 and index < len(evalString) - 1:
+                    return evalString
+            evalString = evalString[1:-1].strip()
+
+        return evalString
+
+    def splitComparison(self, expression):
+        """splits a single comparison into variable, operator and value, e.g. 'age >= 18' -> ('age', '>=', '18')
+
+        Returns:
+            tuple: (variable, operator, value) or None if expression is not a single comparison
+        """
+        match = regpatComparison.fullmatch(expression)
+        if match is None:
+            return None
+
+        return match.group(1), match.group(2), match.group(3)
+
+    def numberList(self, valueString):
+        """parses comma seperated integers, e.g. '-95, -55' -> [-95, -55]
+
+        Returns:
+            list: integers or None if the string contains anything else
+        """
+        values = []
+        for value in valueString.split(","):
+            if not regpatInteger.fullmatch(value):
+                return None
+            values.append(int(value))
+
+        return values
+
+    def parseExpression(self, evalString):
+        """parses a pandas evaluation string (e.g. a filter condition) into an expression tree of comparisons
+        joined by & and |, respecting parentheses and the precedence of & over |
+
+        Args:
+            evalString (string): evaluation string, e.g. '(SD26 == 1 | SD26 == 2) & SD27 == 2'
+
+        Returns:
+            comparison or logical: root of the expression tree, or None if the string uses syntax
+            beyond comparisons, & , | and parentheses and has to be evaluated with pd.eval
+        """
+        tokens = []
+        position = 0
+        evalString = str(evalString)
+        while position < len(evalString):
+            match = regpatToken.match(evalString, position)
+            if match is None or match.end() == position:
+                return None
+            position = match.end()
+
+            if match.group("logic"):
+                tokens.append(match.group("logic"))
+            else:
+                value = match.group("value")
+                if value[0] in "'\"":
+                    value = value[1:-1]
+                elif "." in value:
+                    value = float(value)
+                else:
+                    value = int(value)
+                tokens.append(comparison(match.group("variable"), match.group("operator"), value))
+
+        position = 0
+
+        def parseOr():
+            nonlocal position
+            children = [parseAnd()]
+            while position < len(tokens) and tokens[position] == "|":
+                position += 1
+                children.append(parseAnd())
+            return children[0] if len(children) == 1 else logical("|", children)
+
+        def parseAnd():
+            nonlocal position
+            children = [parseAtom()]
+            while position < len(tokens) and tokens[position] == "&":
+                position += 1
+                children.append(parseAtom())
+            return children[0] if len(children) == 1 else logical("&", children)
+
+        def parseAtom():
+            nonlocal position
+            if position >= len(tokens):
+                raise ValueError("unexpected end of expression")
+            token = tokens[position]
+            position += 1
+            if token == "(":
+                node = parseOr()
+                if position >= len(tokens) or tokens[position] != ")":
+                    raise ValueError("missing closing parenthesis")
+                position += 1
+                return node
+            if isinstance(token, comparison):
+                return token
+            raise ValueError(f"unexpected token {token}")
+
+        try:
+            expression = parseOr()
+        except ValueError:
+            return None
+
+        if position != len(tokens):
+            return None
+
+        return expression
+
     def singleExpParse(self, expression, out="value"):
         """gives either the value or the varname of a conditions, such as 'varName == range'
 
@@ -143,210 +490,77 @@ class parser:
         Returns:
             string: with either value or variable
         """
-        regpat = re.compile(r"(.*)[=!><]=(.*)")
-
         if out == "value":
-            return re.search(regpat, expression).group(2).replace(" ", "")
+            return regpatSingleExp.search(expression).group(2).replace(" ", "")
         elif out == "variable":
-            return re.search(regpat, expression).group(1).replace(" ", "")
+            return regpatSingleExp.search(expression).group(1).replace(" ", "")
         else:
             raise Exception('not an allowed "out" option, only "value" and "variable" allowed')
 
-    def logicSplit(self, evalString):
+    def expandFilter(self, variable, filterDic, expandedCache):
+        """gives the expanded filter condition of a variable as expression tree. The expansions of all filter variables
+        are built first (depth first with an explicit stack) and stored in expandedCache, such that every variable is
+        expanded only once and its expansion is reused by all filter follow questions
 
-        # splitting on &
-        logicSplitList = evalString.split("&")
+        Args:
+            variable (string): filter follow question
+            filterDic (dictionary): filter conditions with variables as keys
+            expandedCache (dictionary): expanded filter conditions by variable, filled by this method
 
-        for num, value in enumerate(logicSplitList):
-            # adding & to the eval string again at the beginning
-            if len(logicSplitList) - 1 == num:
-                pass
-            else:
-                logicSplitList[num + 1] = f"& {logicSplitList[num+1]}"
-
-        # splitting on |
-        for num, value in enumerate(logicSplitList):
-            if "|" in value:
-                secondSplit = value.split("|")
-
-                for numerodos, valuedos in enumerate(secondSplit):
-                    # appending |
-                    if len(secondSplit) - 1 == numerodos:
-                        pass
-                    else:
-                        secondSplit[numerodos + 1] = f"| {secondSplit[numerodos+1]}"
-
-                logicSplitList[num] = secondSplit
-
-        # flattening hirarchies
-        flattenList = (
-            lambda irregular_list: [element for item in irregular_list for element in flattenList(item)]
-            if type(irregular_list) is list
-            else [irregular_list]
-        )
-
-        outList = []
-        for value in flattenList(logicSplitList):
-            if len(value) == 0:
-                pass
+        Returns:
+            comparison or logical: expanded filter condition, None if the condition cannot be parsed
+        """
+        parsed = {}
+        inProgress = set()
+        stack = [variable]
+        while stack:
+            current = stack[-1]
+            if current in expandedCache:
+                stack.pop()
+                continue
+
+            if current not in parsed:
+                parsed[current] = self.parseExpression(filterDic[current])
+                inProgress.add(current)
+                if parsed[current] is not None:
+                    # filter variables on a cycle (already in progress) are left unexpanded
+                    stack += [
+                        parent
+                        for parent in parsed[current].variables()
+                        if parent in filterDic and parent not in expandedCache and parent not in inProgress
+                    ]
+                continue
+
+            stack.pop()
+            inProgress.discard(current)
+            if parsed[current] is None:
+                expandedCache[current] = None
             else:
-                outList.append(value)
+                expandedCache[current] = self.substituteExpanded(parsed[current], expandedCache)
 
-        return outList
+        return expandedCache[variable]
 
-    def filterEvalExtender(self, evalString, filterDic):
-        # using the recusive filter extention function
-        out = self.recursiveEvalExtender(evalString, filterDic)
+    def substituteExpanded(self, expression, expandedCache):
+        """replaces each comparison of a filter variable by the comparison AND the expanded filter of the variable.
+        Comparisons of the same variable joined by & or | share one expanded filter, since
+        (X == 1 & F) | (X == 2 & F) equals (X == 1 | X == 2) & F. Otherwise ranges like 'X == 1-60' would repeat
+        the expanded filter of X sixty times and the expansion would grow exponentially with the filter depth.
 
-        # flattening list hirarchies of output
-        flattenList = (
-            lambda irregular_list: [element for item in irregular_list for element in flattenList(item)]
-            if type(irregular_list) is list
-            else [irregular_list]
-        )
-
-        # cleaning up the string
-        out = " ".join(flattenList(out))
-        out = re.sub(r"\(\&", r"&(", out)
-        out = re.sub(r"\(\|", r"|(", out)
+        Args:
+            expression (comparison or logical): filter condition
+            expandedCache (dictionary): expanded filter conditions by variable
 
-        return out
+        Returns:
+            comparison or logical: expanded filter condition
+        """
+        variables = expression.variables()
+        if len(variables) == 1:
+            expanded = expandedCache.get(variables[0])
+            if expanded is None:
+                return expression
+            return logical("&", [expression, expanded])
 
-    def recursiveEvalExtender(self, evalString, filterDic):
-        """Recursive function"""
-        indexCounter = 0
-        # parse string into single expressions seperated by | and &
-        splitList = self.logicSplit(evalString)
+        # children referring to a single variable are grouped
+        children = [self.substituteExpanded(group, expandedCache) for group in variableGroups(expression)]
 
-        for index, value in enumerate(splitList):
-            try:
-                # get varname
-                varname = self.createVarNameList(value)[0]
-
-                # check if varname has a filtercondition
-                for key, dicValue in filterDic.items():
-                    if varname == key:
-                        # append value as a list after the index where the match was found
-                        indexCounter += 1  # keepting track of how many additions where made
-                        splitList[index] = f"({value}"
-
-                        # look if there are any other | or & in string
-                        if "|" in dicValue or "&" in dicValue:
-                            splitList[index] = f"({value}"
-                            # TODO explain
-                            splitList.insert(
-                                index + indexCounter,
-                                self.recursiveEvalExtender(f"& {dicValue})", filterDic),
-                            )
-                        else:
-                            splitList.insert(index + indexCounter, f"& {dicValue})")
-            except:
-                raise Exception(f"problem at parsing {splitList} and {value}")
-        return splitList
-
-
-if __name__ == "__main__":
-
-    filtTest = {}
-    filtTest[
-        "SD29A_1"
-    ] = "(SD28 >= 1 & (SD27 == 2 & (SD26 == 1 | SD26 == 2 | SD26 == 3 | SD26 == 4))) | ((SD27 == 1 & (SD26 == 1 | SD26 == 2 | SD26 == 3 | SD26 == 4)) | (SD27 == 2 & (SD26 == 1 | SD26 == 2 | SD26 == 3 | SD26 == 4)))"
-
-    filtTest = {
-        "SD28": "SD27 == 2",
-        "SD29A_1": "SD28 >= 1 | (SD27 == 1 | SD27 ==  2)",
-        "SD33_1": 'SD29A_1 != "nan"',
-        "SD38": "SD35 == 1",
-        "SD46": "SD38 == 1 | SD33_1 == 1",
-    }
-
-    pars = parser()
-    evalString = "SD38 == 1 | SD33_1 == 1"
-
-    shouldEvaluateTo = (
-        '(SD38 == 1 & (SD35 == 1)) | (SD33_1 & ((SD29A_1 != "nan") & (SD28 >= 1 | (SD27 == 1 | SD27 ==  2))'
-    )
-
-    # print(pars.logicSplit('& SD7_10 == 1'))
-
-    def extender(evalString, pars, filtTest):
-        """Recursive function"""
-        indexCounter = 0
-        # parse string into | and
-        splitList = pars.logicSplit(evalString)
-
-        print(splitList)
-
-        for index, value in enumerate(splitList):
-            # get varname
-            varname = pars.createVarNameList(value)[0]
-            print(varname)
-
-            # check if varname has a filtercondition
-            for key, dicValue in filtTest.items():
-                if varname == key:
-                    print("yes")
-                    # append value as a list after the index where the match was found
-                    indexCounter += 1  # keepting track of how many additions where made
-                    splitList[index] = f"({value}"
-
-                    # look if there are any other | or & in string
-                    if "|" in dicValue or "&" in dicValue:
-                        # indexCounter += 1
-                        splitList.insert(
-                            index + indexCounter,
-                            extender(f"& {dicValue})", pars, filtTest),
-                        )
-                    else:
-                        splitList.insert(index + indexCounter, f"& {dicValue})")
-
-        return splitList
-
-    def extender2(evalString, pars, filtTest, indexCounter=0):
-        # parse string into | and
-        splitList = pars.logicSplit(evalString)
-        splitListCopy = splitList.copy()
-        newlevel = False
-        # loop through the vars of the filtercondition
-        for index, value in enumerate(splitListCopy):
-            # get varname to compare to filterDic
-            varname = pars.createVarNameList(value)[0]
-
-            # check if varname has a filtercondition
-            for key, dicValue in filtTest.items():
-                # if there is a filtercondition, append it
-                if varname == key:
-                    indexCounter += 1
-                    splitList.insert(index + indexCounter, f"& {dicValue})")
-                    newlevel = [index, True]
-
-        return [splitList, newlevel]
-
-    out = extender(evalString, pars, filtTest)
-    print(out)
-    import pprint
-
-    flattenList = (
-        lambda irregular_list: [element for item in irregular_list for element in flattenList(item)]
-        if type(irregular_list) is list
-        else [irregular_list]
-    )
-
-    out = " ".join(flattenList(out))
-    out = re.sub(r"\(\&", r"&(", out)
-    out = re.sub(r"\(\|", r"|(", out)
-
-    print("\n", out)
-
-    """
-    evalStr = 'SD5 == 7'
-
-    pars = parser()
-
-    out = pars.inputToFullString(evalStr, out = 'variable') 
-    print(out)
-    
-    varlist = re.findall(r'[(&|;]+\s*[(&|;]*(.*?)\s[!=><]=\s', '|'+str(evalStr)) #filtering variables
-    varlist = list(dict.fromkeys(varlist)) #removing duplicates
-    print(varlist)
-    """
+        return logical(expression.operator, children)
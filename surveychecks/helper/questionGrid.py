@@ -0,0 +1,88 @@
+import re
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from surveychecks.helper.typedColumns import sentinelKey
+
+# items of a question grid or multi response battery, e.g. SD29A_1 ... SD29A_30 with the stem SD29A
+regpatGridItem = re.compile(r"^(\w+?)_(\d+)$")
+
+
+def gridStem(name):
+    """stem of a grid item, e.g. 'SD29A' for 'SD29A_12', None for other variables"""
+    match = regpatGridItem.match(name)
+    if match is None:
+        return None
+
+    return match.group(1)
+
+
+def gridUnits(names, signatures, minItems=2):
+    """groups the items of question grids (e.g. SD29A_1 ... SD29A_30) that share the same signature, e.g. the same
+    range or filter condition, such that each grid can be checked as one 2-D block
+
+    Args:
+        names (list): variable names
+        signatures (list): hashable signature of each variable, None for variables that are checked one by one
+        minItems (int): minimum number of items of a grid
+
+    Returns:
+        list: tuples of positions in names, one per grid and one per other variable, in order of the first position
+    """
+    groups = OrderedDict()
+    for position, (name, signature) in enumerate(zip(names, signatures)):
+        stem = gridStem(name)
+        if stem is None or signature is None:
+            groupKey = position
+        else:
+            groupKey = (stem, signature)
+        groups.setdefault(groupKey, []).append(position)
+
+    units = []
+    for positions in groups.values():
+        if len(positions) >= minItems:
+            units.append(tuple(positions))
+        else:
+            units += [(position,) for position in positions]
+
+    return sorted(units)
+
+
+def gridBlock(dataframe, columns):
+    """values of the items of a grid as one 2-D array
+
+    Args:
+        dataframe (pd.DataFrame): data
+        columns (list): items of the grid
+
+    Returns:
+        tuple:
+            [0] np.ndarray, values with one column per item, None if the items are not all plain numeric columns
+            [1] np.ndarray, boolean array of the same shape, True where a value is missing (NaN or sentinel)
+    """
+    for column in columns:
+        if column not in dataframe:
+            return None, None
+        dtype = dataframe[column].dtype
+        if (
+            not pd.api.types.is_numeric_dtype(dtype)
+            or pd.api.types.is_bool_dtype(dtype)
+            or pd.api.types.is_extension_array_dtype(dtype)
+        ):
+            return None, None
+
+    block = dataframe[list(columns)].to_numpy()
+    if block.dtype.kind == "f":
+        missing = np.isnan(block)
+    else:
+        missing = np.zeros(block.shape, dtype=bool)
+
+    # sentinels of compacted columns, NaN (never equal) for the other columns
+    sentinels = dataframe.attrs.get(sentinelKey, {})
+    if any(column in sentinels for column in columns):
+        codes = np.array([sentinels.get(column, np.nan) for column in columns], dtype="float64")
+        missing |= block == codes
+
+    return block, missing
@@ -0,0 +1,95 @@
+import itertools
+
+import openpyxl
+import pandas as pd
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+# maximum number of rows of an Excel worksheet
+excelSheetRows = 1048576
+
+
+class reportWriter:
+    """Writes an Excel report in a single pass using openpyxl's write-only mode. Rows are streamed into the file
+    and header cells get their fonts while being written, the workbook is never read back.
+
+    Args:
+        excelName (string or Path): path of the report
+        maxRows (int): maximum number of rows per sheet including the header, defaults to the Excel limit
+    """
+
+    def __init__(self, excelName, maxRows=None):
+        self.excelName = excelName
+        self.maxRows = excelSheetRows if maxRows is None else min(maxRows, excelSheetRows)
+        self.workbook = openpyxl.Workbook(write_only=True)
+
+    def cell(self, sheet, value, font=None):
+        """creates a cell for a write-only sheet, styled with font"""
+        cell = WriteOnlyCell(sheet, value=value)
+        if font is not None:
+            cell.font = font
+
+        return cell
+
+    def writeMessage(self, title, message, font=None):
+        """writes a sheet holding a single message in the first cell"""
+        sheet = self.workbook.create_sheet(title)
+        sheet.append([self.cell(sheet, message, font)])
+
+    def writeRows(self, title, header, rows):
+        """writes a sheet with a bold header row followed by rows of values, rows beyond maxRows are left out and
+        noted next to the header like in writeFrame
+
+        Args:
+            title (string): sheet name
+            header (list): column names
+            rows (iterable): lists of values
+        """
+        rows = iter(rows)
+        shownRows = list(itertools.islice(rows, self.maxRows - 1))
+        totalRows = len(shownRows) + sum(1 for row in rows)
+
+        sheet = self.workbook.create_sheet(title)
+        headerRow = [self.cell(sheet, value, Font(bold=True)) for value in header]
+        if len(shownRows) < totalRows:
+            headerRow.append(self.cell(sheet, f"{len(shownRows)} of {totalRows} rows shown", Font(bold=True)))
+        sheet.append(headerRow)
+        for row in shownRows:
+            sheet.append(row)
+
+    def writeFrame(self, title, frame, notes=()):
+        """writes a data frame or series including its index, laid out like DataFrame.to_excel, with notes in the
+        first rows of the column next to the data
+
+        Args:
+            title (string): sheet name
+            frame (pd.DataFrame or pd.Series): data to write
+            notes (list): (text, font) tuples, one per row
+        """
+        if isinstance(frame, pd.Series):
+            frame = frame.to_frame()
+        sheet = self.workbook.create_sheet(title)
+
+        notes = list(notes)
+        dataRows = min(len(frame), self.maxRows - 1)
+        if dataRows < len(frame):
+            notes.append((f"{dataRows} of {len(frame)} rows shown", Font(bold=True)))
+
+        header = [None] + [self.cell(sheet, column, Font(bold=True)) for column in frame.columns]
+        rows = frame.iloc[:dataRows]
+        # missing values are written as empty cells
+        rows = rows.astype(object).where(rows.notna(), None)
+        dataRows = (list(row) for row in rows.itertuples(index=True, name=None))
+
+        rowCount = 0
+        for rowCount, row in enumerate(itertools.chain([header], dataRows)):
+            if rowCount < len(notes):
+                row.append(self.cell(sheet, *notes[rowCount]))
+            sheet.append(row)
+
+        # notes beyond the last row of data
+        for note in notes[rowCount + 1 :]:
+            sheet.append([None] * len(header) + [self.cell(sheet, *note)])
+
+    def save(self):
+        self.workbook.save(self.excelName)
@@ -0,0 +1,180 @@
+import contextlib
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+
+
+class stageRecord:
+    """Timing of one stage of a run or of the check of one variable
+
+    Args:
+        stage (string): name of the stage, e.g. "expand filters" or "filterCheck"
+        variable (string): checked variable, None for stages of a whole run
+        detail (string): e.g. the range or filter condition of the variable
+        seconds (float): wall time
+        peakMemory (int): peak of memory allocated by Python during the stage in bytes, None if not tracked
+    """
+
+    __slots__ = ("stage", "variable", "detail", "seconds", "peakMemory")
+
+    def __init__(self, stage, variable, detail, seconds, peakMemory=None):
+        self.stage = stage
+        self.variable = variable
+        self.detail = detail
+        self.seconds = seconds
+        self.peakMemory = peakMemory
+
+    def __repr__(self):
+        return f"stageRecord({self.stage!r}, {self.variable!r}, seconds={self.seconds:.6f})"
+
+
+class stageTimer:
+    """Collects wall time and, if trackMemory is set, peak memory of the stages of a surveychecks run and of the
+    check of each variable. Every finished stage is passed to the callbacks, e.g. for logging it.
+    A disabled timer only hands out no-op contexts.
+
+    Peak memory is measured with tracemalloc (Python allocations including numpy arrays and pandas objects) and
+    slows the run down. When variables are checked on several threads (nJobs), the memory of a variable check
+    includes the allocations of the other threads.
+
+    Args:
+        callbacks (list): callables taking a stageRecord, called when a stage ends
+        trackMemory (bool): whether to record peak memory
+        enabled (bool): whether to record anything
+
+    Attributes:
+        records (list): stageRecord of every finished stage, in order of completion
+    """
+
+    def __init__(self, callbacks=None, trackMemory=False, enabled=True):
+        self.callbacks = list(callbacks or [])
+        self.trackMemory = trackMemory
+        self.enabled = enabled
+        self.records = []
+        self.lock = threading.Lock()
+        # open stages of the current thread, to pass the memory peak of nested stages on to enclosing ones
+        self.local = threading.local()
+
+    def __repr__(self):
+        return f"stageTimer({len(self.records)} records, enabled={self.enabled})"
+
+    def addCallback(self, callback):
+        self.callbacks.append(callback)
+
+    def clear(self):
+        with self.lock:
+            self.records = []
+
+    def stage(self, stage, variable=None, detail=None):
+        """context timing the enclosed code
+
+        Args:
+            stage (string): name of the stage
+            variable (string): checked variable, None for stages of a whole run
+            detail (string): e.g. the condition of the variable
+
+        Returns:
+            context manager
+        """
+        if not self.enabled:
+            return contextlib.nullcontext()
+
+        return self.timeStage(stage, variable, detail)
+
+    @contextlib.contextmanager
+    def timeStage(self, stage, variable, detail):
+        memory = self.trackMemory and tracemalloc.is_tracing()
+        if self.trackMemory and not memory:
+            tracemalloc.start()
+            memory = True
+            stopTracing = True
+        else:
+            stopTracing = False
+
+        openStages = self.local.__dict__.setdefault("openStages", [])
+        if memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # the peak is reset below, enclosing stages keep the peak reached so far
+            if openStages:
+                openStages[-1][1] = max(openStages[-1][1], peak)
+            tracemalloc.reset_peak()
+            openStages.append([current, 0])
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            peakMemory = None
+            if memory:
+                startMemory, nestedPeak = openStages.pop()
+                peak = max(tracemalloc.get_traced_memory()[1], nestedPeak)
+                peakMemory = max(0, peak - startMemory)
+                if openStages:
+                    openStages[-1][1] = max(openStages[-1][1], peak)
+                if stopTracing:
+                    tracemalloc.stop()
+
+            self.add(stageRecord(stage, variable, detail, seconds, peakMemory))
+
+    def add(self, record):
+        """stores a finished stage and passes it to the callbacks"""
+        with self.lock:
+            self.records.append(record)
+        for callback in self.callbacks:
+            callback(record)
+
+    def totals(self):
+        """wall time of the stages of whole runs
+
+        Returns:
+            dictionary: stage names as keys and summed seconds as values, in order of first completion
+        """
+        totals = OrderedDict()
+        for record in self.records:
+            if record.variable is None:
+                totals[record.stage] = totals.get(record.stage, 0.0) + record.seconds
+
+        return totals
+
+    def slowest(self, n=10, stage=None):
+        """slowest variable checks or filter expansions
+
+        Args:
+            n (int): number of records
+            stage (string): only records of this stage, e.g. "rangeCheck", "filterCheck" or "expandFilter"
+
+        Returns:
+            list: stageRecord, slowest first
+        """
+        records = [
+            record
+            for record in self.records
+            if record.variable is not None and (stage is None or record.stage == stage)
+        ]
+
+        return sorted(records, key=lambda record: record.seconds, reverse=True)[:n]
+
+    def report(self, n=10):
+        """prints the wall time (and peak memory) of the stages and the n slowest variables and filter expressions"""
+        for record in self.records:
+            if record.variable is None:
+                print(f"{record.stage:<32} {record.seconds:>10.4f}s{self.memoryLabel(record)}")
+
+        for stage in ("rangeCheck", "filterCheck", "expandFilter"):
+            slowest = self.slowest(n, stage)
+            if len(slowest) == 0:
+                continue
+            print(f"\n{len(slowest)} slowest variables running {stage}:")
+            for record in slowest:
+                detail = str(record.detail)
+                if len(detail) > 100:
+                    detail = detail[:97] + "..."
+                print(f"{record.variable:<32} {record.seconds:>10.4f}s{self.memoryLabel(record)} {detail}")
+
+    def memoryLabel(self, record):
+        if record.peakMemory is None:
+            return ""
+
+        return f" {record.peakMemory / 2**20:>10.1f}MB"
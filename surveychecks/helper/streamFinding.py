@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from surveychecks.helper.typedColumns import restoreMissing
+
+
+class streamFinding:
+    """Violations of one variable accumulated over chunks of data
+
+    Args:
+        variable (string): checked variable
+        condition (string): range or filter condition the variable was checked with
+        sampleSize (int): maximum number of violating rows kept
+
+    Attributes:
+        count (int): number of violating rows over all chunks
+        sample (pd.DataFrame): first violating rows, at most sampleSize
+    """
+
+    __slots__ = ("variable", "condition", "sampleSize", "count", "sampleParts")
+
+    def __init__(self, variable, condition, sampleSize=10):
+        self.variable = variable
+        self.condition = condition
+        self.sampleSize = sampleSize
+        self.count = 0
+        self.sampleParts = []
+
+    def __repr__(self):
+        return f"streamFinding({self.variable!r}, count={self.count})"
+
+    def add(self, chunk, violations):
+        """adds the violations found in one chunk
+
+        Args:
+            chunk (pd.DataFrame): checked data
+            violations (np.ndarray): boolean mask of violating rows of the chunk
+        """
+        violationCount = int(np.count_nonzero(violations))
+        if violationCount == 0:
+            return
+
+        remaining = self.sampleSize - sum(len(part) for part in self.sampleParts)
+        if remaining > 0:
+            # copying keeps only the sampled rows alive, not the whole chunk
+            self.sampleParts.append(restoreMissing(chunk[violations].head(remaining)).copy())
+        self.count += violationCount
+
+    @property
+    def sample(self):
+        if len(self.sampleParts) == 0:
+            return pd.DataFrame()
+
+        return pd.concat(self.sampleParts)
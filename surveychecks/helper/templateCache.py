@@ -0,0 +1,113 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+from surveychecks import __version__
+
+
+class templateCache:
+    """On-disk cache of compiled programing templates, keyed by a hash of the document content, the parts of the
+    document read and the surveychecks version. A changed document or a new surveychecks version therefore never
+    loads a stale entry. For each document path the key of the latest entry is kept as well, such that an edited
+    document can be compiled incrementally from its previous version.
+
+    Args:
+        cacheDir (string or Path): directory of the cache files, defaults to ~/.cache/surveychecks
+    """
+
+    def __init__(self, cacheDir=None):
+        if cacheDir is None:
+            cacheDir = Path.home() / ".cache" / "surveychecks"
+        self.cacheDir = Path(cacheDir)
+
+    def key(self, documentPath, infoIn):
+        """hash of the document content, infoIn and the surveychecks version
+
+        Returns:
+            string: hex digest
+        """
+        digest = hashlib.sha256()
+        digest.update(f"{__version__}|{infoIn}|".encode())
+        with open(documentPath, "rb") as document:
+            for block in iter(lambda: document.read(1 << 20), b""):
+                digest.update(block)
+
+        return digest.hexdigest()
+
+    def path(self, key):
+        return self.cacheDir / f"{key}.pickle"
+
+    def latestPath(self, documentPath, infoIn):
+        """file holding the key of the latest entry of a document path"""
+        digest = hashlib.sha256(f"{__version__}|{infoIn}|{Path(documentPath).resolve()}".encode())
+
+        return self.cacheDir / f"{digest.hexdigest()}.latest"
+
+    def load(self, key):
+        """loads a compiled template
+
+        Returns:
+            dictionary: compiled template attributes, None if there is no (readable) cache entry
+        """
+        try:
+            with open(self.path(key), "rb") as cacheFile:
+                return pickle.load(cacheFile)
+        except Exception:
+            return None
+
+    def loadLatest(self, documentPath, infoIn):
+        """loads the latest compiled version of a document path, e.g. before the document was edited
+
+        Returns:
+            dictionary: compiled template attributes, None if there is no (readable) cache entry
+        """
+        key = self.latestKey(documentPath, infoIn)
+        if key is None:
+            return None
+
+        return self.load(key)
+
+    def latestKey(self, documentPath, infoIn):
+        """key of the latest entry of a document path, None if there is none"""
+        try:
+            return self.latestPath(documentPath, infoIn).read_text().strip()
+        except OSError:
+            return None
+
+    def save(self, key, compiled):
+        """stores a compiled template, writing to a temporary file first such that readers never see partial files.
+        The cache is an optimization only, failing to write it is ignored.
+
+        Args:
+            key (string): cache key
+            compiled (dictionary): compiled template attributes
+        """
+        self.write(self.path(key), lambda cacheFile: pickle.dump(compiled, cacheFile, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def saveLatest(self, documentPath, infoIn, key):
+        """marks an entry as the latest version of a document path, the file is only written if the key changed,
+        such that unchanged documents can be read from read-only or shared cache directories without writes"""
+        if self.latestKey(documentPath, infoIn) == key:
+            return
+
+        self.write(self.latestPath(documentPath, infoIn), lambda cacheFile: cacheFile.write(key.encode()))
+
+    def write(self, path, writer):
+        """writes a cache file through a temporary file, failing to write it is ignored
+
+        Args:
+            path (Path): cache file
+            writer (callable): writes the content to the binary file object passed
+        """
+        tempPath = None
+        try:
+            self.cacheDir.mkdir(parents=True, exist_ok=True)
+            fileDescriptor, tempPath = tempfile.mkstemp(dir=self.cacheDir, suffix=".tmp")
+            with os.fdopen(fileDescriptor, "wb") as cacheFile:
+                writer(cacheFile)
+            os.replace(tempPath, path)
+        except (OSError, pickle.PicklingError, RecursionError):
+            if tempPath is not None and os.path.exists(tempPath):
+                os.remove(tempPath)
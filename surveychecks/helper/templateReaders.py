@@ -0,0 +1,231 @@
+import json
+import re
+from pathlib import Path
+
+import openpyxl
+
+from surveychecks.helper.docReader import docReader
+
+# comparison operator a range condition may start with, e.g. '>= 0' in a range column
+regpatLeadingOperator = re.compile(r"^\s*([!=><]=|[><])")
+# comparisons of a range condition joined by & or |, with their enclosing parentheses
+regpatRangeTerm = re.compile(r"^(\s*\(*\s*)(.*?)(\s*\)*\s*)$", re.DOTALL)
+
+# column names of the XLSX and JSON specifications, compared in lower case
+nameColumns = ("name", "variable", "varname")
+rangeColumns = ("range", "range condition", "rangecondition")
+filterColumns = ("filter", "filter condition", "filtercondition")
+
+
+def variableLineText(name, rangeCondition, filterCondition=None, location=None):
+    """variable line in the syntax of the programing template, e.g. 'SD28 == 1-5 + -95; SD27 == 2'. Every
+    comparison of the range condition without variable name gets the name, e.g. '>= 0 & <= 5' -> 'SD28 >= 0 &
+    SD28 <= 5' and '1-5 + -95' -> 'SD28 == 1-5 + -95'
+
+    Args:
+        name (string): variable name, None if the range condition names the variable itself
+        rangeCondition (string): e.g. '1-5 + -95', '== 1, 2', '>= 0 & <= 5' or 'SD28 == 1-5 + -95'
+        filterCondition (string): e.g. 'SD27 == 2', None or empty for questions without filter
+        location (string): row or entry of the specification, used in error messages
+
+    Returns:
+        string: variable line
+    """
+    terms = re.split(r"([&|])", str(rangeCondition).strip())
+    for position in range(0, len(terms), 2):
+        opening, term, closing = regpatRangeTerm.match(terms[position]).groups()
+        if regpatLeadingOperator.match(term):
+            comparison = f"{name} {term}"
+        elif re.search(r"[!=><]", term) is None:
+            comparison = f"{name} == {term}"
+        else:
+            continue
+        if name is None or term == "":
+            where = "" if location is None else f" in {location}"
+            problem = "empty comparison" if term == "" else "comparison without variable name"
+            raise Exception(f'{problem} in the range condition "{rangeCondition}"{where}')
+        terms[position] = f"{opening}{comparison}{closing}"
+    rangeCondition = "".join(terms)
+
+    if filterCondition is None or str(filterCondition).strip() == "":
+        return rangeCondition
+
+    return f"{rangeCondition}; {str(filterCondition).strip()}"
+
+
+def questionBlock(line):
+    """wraps a variable line into a (Va: ... Vb:) question block, as read by the parser"""
+    return f"(Va:\n{line}\nVb:)"
+
+
+def specificationColumn(header, names):
+    """position of the first header cell matching one of names, None if there is none"""
+    for position, cell in enumerate(header):
+        if cell is not None and str(cell).strip().lower() in names:
+            return position
+
+    return None
+
+
+class textReader:
+    """Reads a programing template exported as plain text, with the same (Va: ... Vb:) question blocks as the
+    Word document
+
+    Args:
+        templatePath (string or Path): text file, read as UTF-8
+    """
+
+    def __init__(self, templatePath):
+        self.templatePath = Path(templatePath)
+        self.text = None
+
+    def loadDocument(self):
+        """reads the file on first use
+
+        Returns:
+            string: text of the file
+        """
+        if self.text is None:
+            self.text = self.templatePath.read_text(encoding="utf-8")
+
+        return self.text
+
+    def iterText(self):
+        """Yields the text line by line"""
+        yield from self.loadDocument().split("\n")
+
+    def getText(self):
+        return self.loadDocument()
+
+
+class xlsxReader:
+    """Reads a programing template from an XLSX sheet with one row per variable and the columns name (or
+    variable), range (or range condition) and optionally filter (or filter condition) in its header row
+
+    Args:
+        templatePath (string or Path): XLSX workbook
+        sheetName (string): sheet with the specification, the first sheet if None
+    """
+
+    def __init__(self, templatePath, sheetName=None):
+        self.templatePath = Path(templatePath)
+        self.sheetName = sheetName
+        self.lines = None
+
+    def loadDocument(self):
+        """reads the sheet on first use
+
+        Returns:
+            list: variable line of each row
+        """
+        if self.lines is not None:
+            return self.lines
+
+        workbook = openpyxl.load_workbook(self.templatePath, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0] if self.sheetName is None else workbook[self.sheetName]
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, ())
+            nameColumn = specificationColumn(header, nameColumns)
+            rangeColumn = specificationColumn(header, rangeColumns)
+            filterColumn = specificationColumn(header, filterColumns)
+            if nameColumn is None or rangeColumn is None:
+                raise Exception(f'no name and range column found in the header of "{self.templatePath}"')
+
+            lines = []
+            for rowNumber, row in enumerate(rows, start=2):
+                name = row[nameColumn] if nameColumn < len(row) else None
+                rangeCondition = row[rangeColumn] if rangeColumn < len(row) else None
+                if name is None or rangeCondition is None:
+                    continue
+                filterCondition = row[filterColumn] if filterColumn is not None and filterColumn < len(row) else None
+                location = f'row {rowNumber} of "{self.templatePath}"'
+                lines.append(variableLineText(str(name).strip(), rangeCondition, filterCondition, location))
+        finally:
+            workbook.close()
+
+        self.lines = lines
+        return self.lines
+
+    def iterText(self):
+        """Yields one question block per variable"""
+        for line in self.loadDocument():
+            yield questionBlock(line)
+
+    def getText(self):
+        return "\n".join(self.iterText())
+
+
+class jsonReader:
+    """Reads a programing template from a JSON specification, a list of variables (or an object with the list
+    under "variables"). Each variable is an object with "name", "range" and optionally "filter", or a complete
+    variable line as string, e.g. "SD28 == 1-5 + -95; SD27 == 2".
+
+    Args:
+        templatePath (string or Path): JSON file, read as UTF-8
+    """
+
+    def __init__(self, templatePath):
+        self.templatePath = Path(templatePath)
+        self.lines = None
+
+    def loadDocument(self):
+        """reads the specification on first use
+
+        Returns:
+            list: variable line of each variable
+        """
+        if self.lines is not None:
+            return self.lines
+
+        with open(self.templatePath, encoding="utf-8") as specFile:
+            specification = json.load(specFile)
+        if isinstance(specification, dict):
+            specification = specification.get("variables", [])
+
+        lines = []
+        for position, variable in enumerate(specification):
+            if isinstance(variable, str):
+                lines.append(variable)
+                continue
+            fields = {str(field).strip().lower(): value for field, value in variable.items()}
+            name = next((fields[field] for field in nameColumns if field in fields), None)
+            rangeCondition = next((fields[field] for field in rangeColumns if field in fields), None)
+            filterCondition = next((fields[field] for field in filterColumns if field in fields), None)
+            if rangeCondition is None:
+                raise Exception(f"no range condition given for variable: {variable}")
+            location = f'variable {position} of "{self.templatePath}"'
+            lines.append(variableLineText(name, rangeCondition, filterCondition, location))
+
+        self.lines = lines
+        return self.lines
+
+    def iterText(self):
+        """Yields one question block per variable"""
+        for line in self.loadDocument():
+            yield questionBlock(line)
+
+    def getText(self):
+        return "\n".join(self.iterText())
+
+
+def templateReader(templatePath, infoIn="all"):
+    """reader of a programing template, chosen by the suffix of its path: Word documents (.docx), plain text
+    exports (.txt), XLSX specifications (.xlsx) and JSON specifications (.json)
+
+    Args:
+        templatePath (string or Path): programing template
+        infoIn (string): which parts of a Word document to read, "table", "body" or "all"
+
+    Returns:
+        docReader, textReader, xlsxReader or jsonReader
+    """
+    suffix = Path(templatePath).suffix.lower()
+    if suffix == ".txt":
+        return textReader(templatePath)
+    elif suffix == ".xlsx":
+        return xlsxReader(templatePath)
+    elif suffix == ".json":
+        return jsonReader(templatePath)
+
+    return docReader(templatePath, infoIn)
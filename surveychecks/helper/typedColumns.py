@@ -0,0 +1,204 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# key of DataFrame.attrs holding the sentinel of each compacted column with missing values
+sentinelKey = "missingSentinels"
+
+# candidate integer dtypes, smallest first
+integerDtypes = (np.int8, np.int16, np.int32, np.int64)
+
+
+def missingSentinel(series):
+    """sentinel standing for missing values (NaN) in a compacted integer column
+
+    Args:
+        series (pd.Series): column of a data frame
+
+    Returns:
+        int: sentinel, None if the column was not compacted or has no missing values
+    """
+    return series.attrs.get(sentinelKey, {}).get(series.name)
+
+
+def missingMask(series):
+    """boolean array, True where a value is missing (NaN, None or the sentinel of a compacted column)"""
+    sentinel = missingSentinel(series)
+    if sentinel is None:
+        return series.isna().to_numpy()
+
+    return series.to_numpy() == sentinel
+
+
+def hasSentinels(dataframe):
+    return len(dataframe.attrs.get(sentinelKey, {})) > 0
+
+
+def restoreMissing(dataframe, columns=None):
+    """gives a data frame with the sentinels of compacted columns replaced by NaN again, e.g. for pd.eval or for
+    showing the rows of a finding. Data frames without sentinels are returned as they are.
+
+    Args:
+        dataframe (pd.DataFrame): data frame, possibly compacted
+        columns (iterable): columns to restore, all compacted columns if None. The sentinels of the other columns
+            are kept in dataframe.attrs
+
+    Returns:
+        pd.DataFrame: data frame with NaN for missing values
+    """
+    if not hasSentinels(dataframe):
+        return dataframe
+
+    sentinels = dataframe.attrs[sentinelKey]
+    if columns is None:
+        columns = sentinels
+    columns = [column for column in columns if column in sentinels and column in dataframe]
+    if len(columns) == 0:
+        return dataframe
+
+    restored = dataframe.copy(deep=False)
+    restored.attrs = {key: value for key, value in dataframe.attrs.items() if key != sentinelKey}
+    kept = {column: sentinel for column, sentinel in sentinels.items() if column not in columns}
+    if len(kept) > 0:
+        restored.attrs[sentinelKey] = kept
+    for column in columns:
+        values = restored[column].to_numpy()
+        restored[column] = np.where(values == sentinels[column], np.nan, values)
+
+    return restored
+
+
+def restoreReferenced(dataframe, condition):
+    """gives a data frame for reading a condition with pd.eval, with the sentinels replaced by NaN only in the
+    compacted columns the condition refers to
+
+    Args:
+        dataframe (pd.DataFrame): data frame, possibly compacted
+        condition (string): range or filter condition, e.g. '(SD26 == 1 | SD26 == 2) & SD27 == 2'
+
+    Returns:
+        pd.DataFrame: data frame with NaN for missing values in the referenced columns
+    """
+    if not hasSentinels(dataframe):
+        return dataframe
+
+    words = set(re.findall(r"\w+", condition))
+    columns = [
+        column
+        for column in dataframe.attrs[sentinelKey]
+        if column in words or (not str(column).isidentifier() and str(column) in condition)
+    ]
+
+    return restoreMissing(dataframe, columns)
+
+
+def concatCompacted(frames):
+    """concatenates data frames keeping the sentinels of compacted columns. A column keeps its sentinel if it has
+    the same sentinel in every frame, otherwise the sentinels of the column are replaced by NaN before.
+
+    Args:
+        frames (list): data frames, possibly compacted
+
+    Returns:
+        pd.DataFrame: concatenated data frame with a new index
+    """
+    sentinelMaps = [frame.attrs.get(sentinelKey, {}) for frame in frames]
+    shared = {}
+    if len(frames) > 0:
+        shared = {
+            column: sentinel
+            for column, sentinel in sentinelMaps[0].items()
+            if all(sentinels.get(column) == sentinel for sentinels in sentinelMaps[1:])
+        }
+
+    restored = [
+        restoreMissing(frame, [column for column in sentinels if column not in shared])
+        for frame, sentinels in zip(frames, sentinelMaps)
+    ]
+    dataframe = pd.concat(restored, ignore_index=True)
+    dataframe.attrs = {}
+    if len(shared) > 0:
+        dataframe.attrs[sentinelKey] = shared
+
+    return dataframe
+
+
+def integralValues(series):
+    """gives the values of a column as float array if all its non missing values are integral numbers
+
+    Args:
+        series (pd.Series): column of a data frame
+
+    Returns:
+        np.ndarray: float values with NaN for missing values, None if the column is not integral
+    """
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return None
+
+    if not pd.api.types.is_numeric_dtype(series.dtype):
+        # numbers stored as strings, e.g. from CSV or SPSS exports, blank strings count as missing
+        if not (pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype)):
+            return None
+        blank = series.map(lambda value: isinstance(value, str) and value.strip() == "").to_numpy(dtype=bool)
+        numeric = pd.to_numeric(series.mask(blank), errors="coerce")
+        if numeric.notna().sum() != (series.notna().to_numpy() & ~blank).sum():
+            return None
+        series = numeric
+
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    present = values[~np.isnan(values)]
+    if not np.all(np.floor(present) == present):
+        return None
+
+    return values
+
+
+def compactColumn(series, declared=(), categoryShare=0.5):
+    """downcasts a column to the smallest integer dtype holding its values and the declared values of its range.
+    Missing values are mapped to a sentinel below all of them. Columns of text with few distinct values become
+    categorical, other columns are kept.
+
+    Args:
+        series (pd.Series): column of a data frame
+        declared (iterable): values and bounds declared in the range condition of the column
+        categoryShare (float): maximum share of distinct values for text columns to become categorical
+
+    Returns:
+        tuple:
+            [0] pd.Series, compacted column
+            [1] int, sentinel of missing values, None if the column has no missing values or was not compacted
+    """
+    if pd.api.types.is_integer_dtype(series.dtype) and not pd.api.types.is_extension_array_dtype(series.dtype):
+        # integer columns have no missing values, they are downcast without going through float
+        values = series.to_numpy()
+        missing = np.zeros(len(values), dtype=bool)
+        present = values
+    else:
+        values = integralValues(series)
+        if values is None:
+            isText = pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype)
+            if isText and series.nunique() <= categoryShare * len(series):
+                return series.astype("category"), None
+            return series, None
+        missing = np.isnan(values)
+        present = values[~missing]
+
+    declared = [value for value in declared if value is not None]
+    bounds = ([present.min(), present.max()] if len(present) > 0 else []) + declared
+    if len(bounds) == 0:
+        return series, None
+    lower, upper = min(bounds), max(bounds)
+
+    declaredValues = set(declared)
+    for dtype in integerDtypes:
+        info = np.iinfo(dtype)
+        if missing.any():
+            # the sentinel is the smallest value of the dtype, below all observed and declared values
+            if info.min < lower and upper <= info.max and info.min not in declaredValues:
+                compact = np.where(missing, info.min, values).astype(dtype)
+                return pd.Series(compact, index=series.index, name=series.name), int(info.min)
+        elif info.min <= lower and upper <= info.max:
+            return pd.Series(values.astype(dtype), index=series.index, name=series.name), None
+
+    return series, None
@@ -0,0 +1,34 @@
+class variableLine:
+    """Structured result of parsing one variable line of the programing template, e.g.
+    'kid == 1, 2 + -55; partner == 1' gives the name 'kid', the range condition 'kid == 1, 2 + -55', the missing
+    codes [-55] and the filter condition 'partner == 1'
+
+    Args:
+        line (string): variable line
+        name (string): variable name
+        rangeCondition (string): range condition as written in the template
+        expandedRange (string): range condition as pandas evaluation string
+        compiledRange (compiledRange): compiled range condition, None if it can only be read with pd.eval
+        filterCondition (string): filter condition as pandas evaluation string, None if the line has no filter
+    """
+
+    __slots__ = ("line", "name", "rangeCondition", "expandedRange", "compiledRange", "filterCondition")
+
+    def __init__(self, line, name, rangeCondition, expandedRange, compiledRange, filterCondition=None):
+        self.line = line
+        self.name = name
+        self.rangeCondition = rangeCondition
+        self.expandedRange = expandedRange
+        self.compiledRange = compiledRange
+        self.filterCondition = filterCondition
+
+    def __repr__(self):
+        return f"variableLine({self.name!r}, {self.rangeCondition!r}, filter={self.filterCondition!r})"
+
+    @property
+    def missings(self):
+        """missing codes of the range condition, empty if the range could not be compiled"""
+        if self.compiledRange is None:
+            return []
+
+        return list(self.compiledRange.missings)
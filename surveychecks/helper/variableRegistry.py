@@ -0,0 +1,63 @@
+class variableRegistry:
+    """Variables of the programing template in template order, with a hash map from variable name to position such
+    that looking up a variable or testing whether a data frame column is part of the template takes constant time.
+    If a variable appears on several lines, the name refers to its first line.
+
+    Args:
+        variableLines (list): variableLine for each variable line of the template
+
+    Attributes:
+        lines (list): variableLine for each variable line, in template order
+        index (dictionary): variable names as keys and position of their first line as values
+    """
+
+    __slots__ = ("lines", "index")
+
+    def __init__(self, variableLines):
+        self.lines = list(variableLines)
+        self.index = {}
+        for position, line in enumerate(self.lines):
+            self.index.setdefault(line.name, position)
+
+    def __repr__(self):
+        return f"variableRegistry({len(self.index)} variables)"
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __getitem__(self, name):
+        """variableLine of a variable name"""
+        return self.lines[self.index[name]]
+
+    def names(self):
+        """distinct variable names, in template order"""
+        return list(self.index)
+
+    def missingFrom(self, columns):
+        """variables of the template that are not in columns, in template order
+
+        Args:
+            columns (iterable): e.g. the columns of a data frame
+
+        Returns:
+            list: variable names
+        """
+        columns = set(columns)
+        return [line.name for line in self.lines if line.name not in columns]
+
+    def notIn(self, columns):
+        """columns that are not variables of the template, in the order of columns
+
+        Args:
+            columns (iterable): e.g. the columns of a data frame
+
+        Returns:
+            list: column names
+        """
+        return [column for column in columns if column not in self.index]
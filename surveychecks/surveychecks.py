@@ -1,30 +1,303 @@
+import hashlib
+import os
 import re
+import threading
 import pandas as pd
 import numpy as np
-import openpyxl
-from openpyxl.styles import Font, Color
+from openpyxl.styles import Font
 from pathlib import Path
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-from surveychecks.helper.docReader import docReader
+from surveychecks.helper.templateReaders import templateReader
 from surveychecks.helper.parser import parser
+from surveychecks.helper.filterExpression import maskCache, routedCondition
+from surveychecks.helper.filterGraph import filterGraph
+from surveychecks.helper.templateCache import templateCache
+from surveychecks.helper.streamFinding import streamFinding
+from surveychecks.helper.checkResult import checkResult
+from surveychecks.helper.reportWriter import reportWriter
+from surveychecks.helper.incrementalState import incrementalState
+from surveychecks.helper.variableRegistry import variableRegistry
+from surveychecks.helper.stageTimer import stageTimer
+from surveychecks.helper.checkLog import checkLog
+from surveychecks.helper.typedColumns import (
+    compactColumn,
+    concatCompacted,
+    missingMask,
+    restoreMissing,
+    restoreReferenced,
+    sentinelKey,
+)
+from surveychecks.helper.questionGrid import gridBlock, gridUnits
+from surveychecks.helper.columnarSource import columnarSource, isColumnarFile
 
 
 class surveychecks:
-    def __init__(self, dataframe, wordDocumentPath, infoIn="table"):
-        self.dataframe = dataframe
+    """Compares a survey data set with the programing template used to set up the survey: whether all variables are
+    in the data, whether the values meet the range conditions and whether the filter conditions were followed.
+
+    Args:
+        dataframe (pd.DataFrame or string): survey data, or the path of an Arrow/Feather or Parquet file that is
+            memory mapped and loaded column by column. Can be None for streamCheck, incrementalCheck and batchCheck,
+            which take their data as arguments and do not use self.dataframe
+        wordDocumentPath (string or Path): programing template, a Word document, text export, XLSX or JSON
+            specification
+        infoIn (string): which parts of a Word document to read, "table", "body" or "all"
+        useCache (bool): whether to load and store the compiled template in the template cache
+        cacheDir (string or Path): directory of the template cache, defaults to ~/.cache/surveychecks
+        timer (stageTimer): records the time of the stages and variable checks, None to record nothing
+        verbosity (string): "findings", "summary" or "quiet", see checkLog
+        logger (logging.Logger): logger receiving the output instead of printing it
+        dataColumns (list): columns besides the template variables to load from a file, e.g. a respondent ID
+    """
+
+    # attributes compiled from the programing template, stored in the template cache
+    templateAttributes = (
+        "varlist",
+        "blockLines",
+        "variableLines",
+        "varnameList",
+        "rangeList",
+        "compiledRangeList",
+        "filterDic",
+        "filterExpressions",
+        "expandedFilterExpressions",
+        "expandedFilterDic",
+        "filterGraph",
+        "allFilterDicConditions",
+    )
+
+    def __init__(
+        self,
+        dataframe,
+        wordDocumentPath,
+        infoIn="all",
+        useCache=True,
+        cacheDir=None,
+        timer=None,
+        verbosity=None,
+        logger=None,
+        dataColumns=None,
+    ):
+        # a path to an Arrow/Feather or Parquet file is memory mapped, the columns of the template variables (and
+        # dataColumns, e.g. a respondent ID) are loaded when a check first needs the data
+        if isColumnarFile(dataframe):
+            self.dataSource = columnarSource(dataframe)
+            dataframe = None
+        else:
+            self.dataSource = None
+        self.dataColumns = list(dataColumns or [])
+        self.frame = dataframe
+        self.loadLock = threading.Lock()
         self.wordDocumentPath = Path(wordDocumentPath)
 
-        self.doc = docReader(self.wordDocumentPath, infoIn)
-        self.text = self.doc.getText()
-        self.pars = parser(self.text)
-        self.varlist = self.pars.getVarInfo()
+        # findings and summaries of the checks, printed or passed to logger
+        self.log = checkLog(verbosity, logger)
+
+        # wall time (and peak memory) of the stages and variable checks, only recorded if a timer is passed
+        self.timer = timer if timer is not None else stageTimer(enabled=False)
+
+        # memoized masks of filter conditions on self.dataframe
+        self.maskCache = maskCache(self.frame)
+
+        # the template (Word document, text export, XLSX or JSON specification) is read once and its question blocks
+        # are extracted while streaming through it
+        self.doc = templateReader(self.wordDocumentPath, infoIn)
+
+        # a template that did not change since the last run is loaded from the cache instead of parsing it again
+        self.templateCache = templateCache(cacheDir) if useCache else None
+        compiled = None
+        if self.templateCache is not None:
+            with self.timer.stage("load template cache"):
+                cacheKey = self.templateCache.key(self.wordDocumentPath, infoIn)
+                compiled = self.templateCache.load(cacheKey)
+            # entries written before attributes were added to the template are compiled again
+            if compiled is not None and not all(name in compiled for name in self.templateAttributes):
+                compiled = None
+
+        if compiled is None:
+            # an edited document is compiled from its previous version, only changed question blocks are parsed
+            previous = None
+            if self.templateCache is not None:
+                with self.timer.stage("load previous template"):
+                    previous = self.templateCache.loadLatest(self.wordDocumentPath, infoIn)
+                if previous is not None and not all(name in previous for name in self.templateAttributes):
+                    previous = None
+
+            self.compileTemplate(previous)
+            if self.templateCache is not None:
+                with self.timer.stage("save template cache"):
+                    compiledAttributes = {name: getattr(self, name) for name in self.templateAttributes}
+                    self.templateCache.save(cacheKey, compiledAttributes)
+        else:
+            self.pars = parser()
+            for name in self.templateAttributes:
+                setattr(self, name, compiled[name])
+            self.pars.varlist = self.varlist
+        if self.templateCache is not None:
+            self.templateCache.saveLatest(self.wordDocumentPath, infoIn, cacheKey)
+
+        # variable lines by name
+        self.variables = variableRegistry(self.variableLines)
+
+        # expanded filter conditions evaluated from the masks of the filter variables
+        self.routedConditions = self.makeRoutedConditions()
+
+        # items of question grids sharing a range or filter condition, checked as one block
+        self.rangeGrids, self.filterGrids = self.makeGrids()
+
+        for cycle in self.filterGraph.cycles:
+            self.log.warning("Filter conditions form a cycle: %s", " -> ".join(cycle))
+
+    @property
+    def dataframe(self):
+        """checked data, loaded from the data file with the template columns when first needed"""
+        if self.frame is None and self.dataSource is not None:
+            # checks running on several threads load the data once
+            with self.loadLock, self.timer.stage("load data"):
+                if self.frame is None:
+                    self.frame = self.dataSource.load(self.templateColumns() + self.dataColumns)
+
+        return self.frame
+
+    @dataframe.setter
+    def dataframe(self, dataframe):
+        self.frame = dataframe
+
+    def templateColumns(self):
+        """variables of the template, including the variables only used in filter conditions
+
+        Returns:
+            list: variable names in order of appearance
+        """
+        filterColumns = [var for key, value in self.filterDic.items() for var in [key] + self.filterVariables(value)]
+
+        return list(dict.fromkeys(self.varnameList + filterColumns))
+
+    def dataColumnNames(self):
+        """columns of the data, read from the schema of the data file without loading it"""
+        if self.frame is None and self.dataSource is not None:
+            return list(self.dataSource.columns)
+
+        return list(self.dataframe)
+
+    def compileTemplate(self, previous=None):
+        """parses the programing template into variable names, range conditions and (expanded) filter conditions
+
+        Args:
+            previous (dictionary): compiled attributes of the previous version of the template, question blocks
+                and filter expansions that did not change are taken from it
+        """
+        if previous is None:
+            previous = {}
+
+        with self.timer.stage("read document"):
+            self.doc.loadDocument()
+        with self.timer.stage("parse question blocks"):
+            self.pars = parser(chunks=self.doc.iterText())
+            self.varlist = self.pars.getVarInfo()
+        with self.timer.stage("parse variable lines"):
+            self.blockLines = self.makeBlockLines(previous.get("blockLines"))
+            self.variableLines = self.makeVariableLines()
+
+            self.varnameList = self.makeVarnameList()
+            self.rangeList = self.makeRangeList()
+            self.compiledRangeList = self.makeCompiledRangeList()
+            self.filterDic = self.makeFilterDic()
+
+        # parsed filter conditions, the conditions of the previous version are not parsed again
+        previousExpressions = previous.get("filterExpressions", {})
+        self.filterExpressions = {
+            condition: previousExpressions[condition]
+            for condition in self.filterDic.values()
+            if condition in previousExpressions
+        }
+
+        with self.timer.stage("filter graph"):
+            self.filterGraph = self.makeFilterGraph()
+            self.allFilterDicConditions = self.makeAllFilterDicConditions()
+
+        # expanded filter conditions, only variables whose filter conditions changed are expanded again
+        self.expandedFilterExpressions = self.reusableExpansions(previous)
+        with self.timer.stage("expand filters"):
+            self.expandedFilterDic = self.expandFilterDic()
+
+    @property
+    def text(self):
+        """full text of the document parts read, only joined when asked for"""
+        return self.doc.getText()
+
+    def makeBlockLines(self, previousBlockLines=None):
+        """parses every variable line of the template once into name, range condition, missing codes and filter
+        condition, block by block. Blocks are keyed by a hash of their text, blocks of the previous version of the
+        template that did not change are not parsed again.
+
+        Args:
+            previousBlockLines (dictionary): blockLines of the previous version of the template
+
+        Returns:
+            dictionary: hash of the block text as keys and variableLine of each line of the block as values
+        """
+        if previousBlockLines is None:
+            previousBlockLines = {}
+
+        blockLines = OrderedDict()
+        for block in self.pars.varBlocks:
+            blockHash = hashlib.sha1(block.encode()).hexdigest()
+            if blockHash in previousBlockLines:
+                blockLines[blockHash] = previousBlockLines[blockHash]
+                continue
+
+            variableLines = []
+            for var in self.pars.blockLines(block):
+                try:
+                    variableLines.append(self.pars.parseLine(var))
+                except:
+                    raise Exception(f'Problem parsing the following variable line: "{var}"')
+            blockLines[blockHash] = variableLines
+
+        return blockLines
+
+    def makeVariableLines(self):
+        """collects the parsed variable lines of all question blocks, all other lists and dictionaries of the
+        template are built from these
+
+        Returns:
+            list: variableLine for each variable
+        """
+        return [line for variableLines in self.blockLines.values() for line in variableLines]
+
+    def reusableExpansions(self, previous):
+        """expanded filter conditions of the previous version of the template that are still valid, i.e. neither
+        the filter condition of the variable nor the filter conditions of the variables it depends on changed.
+        Variables on or behind a filter cycle are always expanded again.
+
+        Args:
+            previous (dictionary): compiled attributes of the previous version of the template
+
+        Returns:
+            dictionary: expanded filter conditions by variable, used to seed self.expandedFilterExpressions
+        """
+        if "filterDic" not in previous:
+            return {}
+
+        previousFilterDic = previous["filterDic"]
+        changed = {
+            key
+            for key in set(previousFilterDic) | set(self.filterDic)
+            if previousFilterDic.get(key) != self.filterDic.get(key)
+        }
+        ordered = set(self.filterGraph.order)
+
+        reusable = {}
+        for key, expression in previous["expandedFilterExpressions"].items():
+            if key not in self.filterDic or key not in ordered or key in changed:
+                continue
+            if changed.isdisjoint(self.filterGraph.ancestors(key)):
+                reusable[key] = expression
 
-        self.varnameList = self.makeVarnameList()
-        self.rangeList = self.makeRangeList()
-        self.filterDic = self.makeFilterDic()
-        self.expandedFilterDic = self.expandFilterDic()
-        self.allFilterDicConditions = self.makeAllFilterDicConditions()
+        return reusable
 
     def makeFilterDic(self):
         """creates the filter dictionary necessary for filterCheck
@@ -33,65 +306,133 @@ class surveychecks:
             dictionary: filter dictionary with keys as variables and values filterconditions to be read with pd.eval
         """
         filterDic = OrderedDict()
-        for var in self.varlist:
-            try:
-                templist = var.split(";")
-                if len(templist) == 2:
-                    filterDic[self.pars.inputToFullString(templist[0], out="variable")] = self.pars.inputToFullString(
-                        templist[1].lstrip()
-                    )
-            except:
-                raise Exception(f'filterDic parsing error at "{var}"')
+        for line in self.variableLines:
+            if line.filterCondition is not None:
+                filterDic[line.name] = line.filterCondition
 
         return filterDic
 
-    def expandFilterDic(self):  # TODO update docstring
+    def expandFilterDic(self):
         """expands filterdic to include all filterchecks of variables within the filter e.g.:
         E0 == 1, 2; EX == 1 & EY >= 1
         E1 == 1, 2; E0 == 1 | EP == 2
         E2 == 1, 2; E1 == 1 | EM == 1
         Filtercondition Evaluation expansion for E2 should include all Filterconditions of E1 and previous, such that
-        Filtercondition E2: (E1 == 1 & ((E0 == 1 & (EX == 1 & EY >= 1)) | EP == 2)) | EM == 1
+        Filtercondition E2: ((E1 == 1 & ((E0 == 1 & EX == 1 & EY >= 1) | EP == 2)) | EM == 1)
+        Each variable is expanded once, filter follow questions reuse the expansion of their filter variables.
+
+        Returns:
+            dictionary: filter dictionary with expanded filter conditions as values
         """
         expandedFilterDic = OrderedDict()
         for key, value in self.filterDic.items():
-            # extending the filterDictionary
-            expandedFilterDic[key] = self.pars.filterEvalExtender(value, self.filterDic)
+            # filter variables expanded on the way are part of the time of the first variable needing them
+            with self.timer.stage("expandFilter", key, value):
+                expression = self.pars.expandFilter(key, self.filterDic, self.expandedFilterExpressions)
+            if expression is None:
+                expandedFilterDic[key] = value
+            else:
+                expandedFilterDic[key] = str(expression)
+                # the expanded tree is already parsed, no need to parse the expanded string again
+                self.filterExpressions[expandedFilterDic[key]] = expression
 
         return expandedFilterDic
 
-    def makeAllFilterDicConditions(self):  # TODO update docstring
+    def makeFilterGraph(self):
+        """creates the graph of filter dependencies between variables
 
-        expandedFilterDic = OrderedDict()
+        Returns:
+            filterGraph: edges from each filter follow question to the variables of its filter condition
+        """
+        edges = OrderedDict()
         for key, value in self.filterDic.items():
-            expandedFilterCondition = f"({value})"
-            filterQuestionListToCheck = self.pars.createVarNameList(value)
-            filterQuestionListChecked = []
+            edges[key] = self.filterVariables(value)
+
+        return filterGraph(edges)
+
+    def makeAllFilterDicConditions(self):
+        """collects for each filter follow question all variables its filter condition depends on, including the
+        filter variables of its filter variables, e.g.:
+        E1 == 1, 2; E0 == 1 | EP == 2
+        E2 == 1, 2; E1 == 1 | EM == 1
+        gives E2: [E1, EM, E0, EP]
 
-            while True:
-                # look for filterconditions in new variables of previous filtercondition
-                loopTempList = filterQuestionListToCheck.copy()
-                for filterQuestion in loopTempList:
-                    if filterQuestion in self.filterDic.keys():
-                        expandedFilterCondition += f" & ({self.filterDic[filterQuestion]})"
-                    filterQuestionListChecked.append(filterQuestion)
-                    filterQuestionListToCheck.remove(filterQuestion)
+        Returns:
+            dictionary: filter follow questions as keys and lists of all (transitive) filter variables as values
+        """
+        allFilterDicConditions = OrderedDict()
+        for key in self.filterDic:
+            allFilterDicConditions[key] = list(self.filterGraph.ancestors(key))
+
+        return allFilterDicConditions
 
-                # parse out all variables in the new expanded filtercondition
-                newQuestionListToCheck = self.pars.createVarNameList(expandedFilterCondition)
+    def makeRoutedConditions(self):
+        """creates the routed conditions of the filter follow questions in topological order, such that the
+        routed conditions of the filter variables of a question exist before its own. Questions on or behind a
+        filter cycle and conditions the parser does not understand are left out, their expanded condition strings
+        are evaluated instead.
 
-                # check if there are new variables
-                for question in newQuestionListToCheck:
-                    if question not in filterQuestionListChecked:
-                        filterQuestionListToCheck.append(question)
+        Returns:
+            dictionary: filter follow questions as keys and routedCondition as values, in topological order
+        """
+        routedConditions = OrderedDict()
+        for key in self.filterGraph.order:
+            if key in self.filterDic:
+                expression = self.filterExpression(self.filterDic[key])
+                if expression is not None:
+                    routedConditions[key] = routedCondition(key, expression, routedConditions)
 
-                # break loop if no new variables to be checked
-                if len(filterQuestionListToCheck) == 0:
-                    break
+        return routedConditions
 
-            expandedFilterDic[key] = self.pars.createVarNameList(expandedFilterCondition)
+    def makeGrids(self):
+        """groups the items of question grids (e.g. SD29A_1 ... SD29A_30), items sharing the same compiled range
+        condition are range checked as one block and items sharing the same filter condition are filter checked as
+        one block
 
-        return expandedFilterDic
+        Returns:
+            tuple:
+                [0] list of tuples of positions in self.varnameList, one per grid and one per other variable
+                [1] list of tuples of positions in self.filterDic, one per grid and one per other variable
+        """
+        rangeSignatures = [
+            (compiled.values, compiled.intervals, compiled.missings)
+            if compiled is not None and compiled.variable == singleVar
+            else None
+            for singleVar, compiled in zip(self.varnameList, self.compiledRangeList)
+        ]
+        rangeGrids = gridUnits(self.varnameList, rangeSignatures)
+        filterGrids = gridUnits(list(self.filterDic), list(self.filterDic.values()))
+
+        return rangeGrids, filterGrids
+
+    def filterVariables(self, condition):
+        """gives the variables used in a filter condition, in order of appearance
+
+        Args:
+            condition (string): filter condition
+
+        Returns:
+            list: variable names
+        """
+        expression = self.filterExpression(condition)
+        if expression is None:
+            return self.pars.createVarNameList(condition)
+
+        return expression.variables()
+
+    def filterExpression(self, condition):
+        """parses a filter condition into an expression tree, once per condition
+
+        Args:
+            condition (string): filter condition
+
+        Returns:
+            comparison or logical: expression tree, None if the condition can only be read with pd.eval
+        """
+        if condition not in self.filterExpressions:
+            self.filterExpressions[condition] = self.pars.parseExpression(condition)
+
+        return self.filterExpressions[condition]
 
     def makeRangeList(self):
         """creates the range dictionary necessary for rangeCheck
@@ -99,15 +440,15 @@ class surveychecks:
         Returns:
             list: range condition for each variable to be read with pd.eval
         """
-        rangeList = []
-        for var in self.varlist:
-            try:
-                templist = var.split(";")
-                rangeList.append(self.pars.inputToFullString(templist[0]))
-            except:
-                raise Exception(f"rangeList parsing error {var}")
+        return [line.expandedRange for line in self.variableLines]
+
+    def makeCompiledRangeList(self):
+        """creates the compiled range conditions used by rangeCheck instead of evaluating the expanded strings
 
-        return rangeList
+        Returns:
+            list: compiledRange for each variable, None where the range can only be read with pd.eval
+        """
+        return [line.compiledRange for line in self.variableLines]
 
     def makeVarnameList(self):
         """creates list of varnames for varCheck
@@ -115,14 +456,47 @@ class surveychecks:
         Returns:
             list: list consisting of varnames found in the document
         """
-        varNameList = []
-        for var in self.varlist:
-            templist = var.split(";")
-            varNameList.append(self.pars.inputToFullString(templist[0], out="variable"))
+        return [line.name for line in self.variableLines]
+
+    def compactDataframe(self, filterMissVal=None, categoryShare=0.5):
+        """Converts the columns of the template variables in self.dataframe to compact dtypes, e.g. after reading
+        SPSS or CSV exports where codes come as float or text. Integral columns are downcast to the smallest
+        integer dtype holding their values and the values declared in their range condition, missing values (NaN)
+        become a sentinel below all of them, stored in dataframe.attrs["missingSentinels"]. Text columns with few
+        distinct values become categorical. The checks treat the sentinel like NaN and the findings show NaN again.
+
+        Args:
+            filterMissVal (int): value of filter missings, kept representable in the compact columns
+            categoryShare (float): maximum share of distinct values for text columns to become categorical
+
+        Returns:
+            pd.DataFrame: compacted data frame, also assigned to self.dataframe
+        """
+        declared = {}
+        for compiled in self.compiledRangeList:
+            if compiled is not None:
+                bounds = [bound for interval in compiled.intervals for bound in interval[:2]]
+                declared.setdefault(compiled.variable, []).extend(list(compiled.allowedValues()) + bounds)
+        extra = [] if filterMissVal is None else [filterMissVal]
+
+        columns = [var for var in self.templateColumns() if var in self.dataframe]
+
+        with self.timer.stage("compact data frame"):
+            dataframe = self.dataframe.copy(deep=False)
+            sentinels = dict(dataframe.attrs.get(sentinelKey, {}))
+            for column in columns:
+                if column in sentinels:
+                    continue
+                series, sentinel = compactColumn(dataframe[column], declared.get(column, []) + extra, categoryShare)
+                dataframe[column] = series
+                if sentinel is not None:
+                    sentinels[column] = sentinel
+            dataframe.attrs[sentinelKey] = sentinels
 
-        return varNameList
+        self.dataframe = dataframe
+        return dataframe
 
-    def varCheck(self, excelOut=False):  # TODO update docstring
+    def varCheck(self, excelOut=False, excelMaxRows=None):  # TODO update docstring
         """Evaluates whether all variables in the file are in the data frame.
 
         Args:
@@ -133,58 +507,48 @@ class surveychecks:
                 [0] variables found in the data frame
                 [1] variables not found in the data frame
         """
-        dataVarnames = list(self.dataframe)
+        dataVarnames = self.dataColumnNames()
 
-        bugCounter = 0
-        includedVarnames = []
-        excludedVarnamesDoc = []
-        for varname in self.varnameList:
-            if varname in dataVarnames:
-                includedVarnames.append(varname)
-            else:
-                bugCounter += 1
-                print(f'Variable "{varname}" not found in dataset')
-                excludedVarnamesDoc.append(varname)
+        # set and hash map lookups instead of scanning the variable lists
+        excludedVarnamesDoc = self.variables.missingFrom(dataVarnames)
+        for varname in excludedVarnamesDoc:
+            self.log.finding('Variable "%s" not found in dataset', varname)
+        excluded = set(excludedVarnamesDoc)
+        includedVarnames = [varname for varname in self.varnameList if varname not in excluded]
 
-        print(f'"{len(includedVarnames)}" out of "{len(self.varnameList)}" doc variables included in dataframe')
+        self.log.summary(
+            '"%s" out of "%s" doc variables included in dataframe', len(includedVarnames), len(self.varnameList)
+        )
 
-        bugCounter = 0
-        excludedVarnamesDF = []
-        for varname in dataVarnames:
-            if varname not in self.varnameList:
-                bugCounter += 1
-                print(f'Variable "{varname}" not found in doc')
-                excludedVarnamesDF.append(varname)
+        excludedVarnamesDF = self.variables.notIn(dataVarnames)
+        for varname in excludedVarnamesDF:
+            self.log.finding('Variable "%s" not found in doc', varname)
 
-        print(f'"{len(includedVarnames)}" out of "{len(dataVarnames)}" dataframe variables included in doc')
+        self.log.summary(
+            '"%s" out of "%s" dataframe variables included in doc', len(includedVarnames), len(dataVarnames)
+        )
 
         if excelOut == True:
-            allVars = includedVarnames + excludedVarnamesDoc + excludedVarnamesDF
-            dfOut = pd.DataFrame(allVars, columns=["All Variables"])
-            dfOut["Only in Document"] = dfOut["All Variables"].isin(excludedVarnamesDoc)
-            dfOut["Only in Dataframe"] = dfOut["All Variables"].isin(excludedVarnamesDF)
-
-            excelName = self.wordDocumentPath.with_name(f"VC_{self.wordDocumentPath.stem}.xlsx")
-            with pd.ExcelWriter(excelName) as writer:
-                dfOut.to_excel(writer, sheet_name=f"VarCheck")
-
-            wb = openpyxl.load_workbook(excelName)
-            ws = wb.active
-            d = ws.cell(
-                row=1,
-                column=5,
-                value=f'"{len(includedVarnames)}" out of "{len(self.varnameList)}" doc variables included in dataframe',
-            )
-            d.font = Font(color="008000" if len(excludedVarnamesDoc) == 0 else "FF0000", bold=True)
-
-            d = ws.cell(
-                row=2,
-                column=5,
-                value=f'"{len(includedVarnames)}" out of "{len(dataVarnames)}" dataframe variables included in doc',
-            )
-            d.font = Font(color="008000" if len(excludedVarnamesDF) == 0 else "FF0000", bold=True)
+            with self.timer.stage("excel report"):
+                allVars = includedVarnames + excludedVarnamesDoc + excludedVarnamesDF
+                dfOut = pd.DataFrame(allVars, columns=["All Variables"])
+                dfOut["Only in Document"] = dfOut["All Variables"].isin(excludedVarnamesDoc)
+                dfOut["Only in Dataframe"] = dfOut["All Variables"].isin(excludedVarnamesDF)
 
-            wb.save(excelName)
+                excelName = self.wordDocumentPath.with_name(f"VC_{self.wordDocumentPath.stem}.xlsx")
+                report = reportWriter(excelName, excelMaxRows)
+                notes = [
+                    (
+                        f'"{len(includedVarnames)}" out of "{len(self.varnameList)}" doc variables included in dataframe',
+                        Font(color="008000" if len(excludedVarnamesDoc) == 0 else "FF0000", bold=True),
+                    ),
+                    (
+                        f'"{len(includedVarnames)}" out of "{len(dataVarnames)}" dataframe variables included in doc',
+                        Font(color="008000" if len(excludedVarnamesDF) == 0 else "FF0000", bold=True),
+                    ),
+                ]
+                report.writeFrame("VarCheck", dfOut, notes)
+                report.save()
 
         return {
             "In Document & Dataframe": includedVarnames,
@@ -192,228 +556,933 @@ class surveychecks:
             "In Document only": excludedVarnamesDoc,
         }
 
-    def rangeCheck(self, checkType="unallowed", outList="failed", excelOut=False):  # TODO update docstring
+    def rangeCheck(
+        self, checkType="unallowed", outList="failed", excelOut=False, nJobs=1, excelMaxRows=None
+    ):  # TODO update docstring
         """Evaluates whether there are unallowed values in a variables range condition or
         if there are missings values in a variable given the specified range condition
 
         Args:
             checkType (string): whether to check for unallowed values or missing values
             outList (string): whether to return sucessfull checks or the failed checks
+            nJobs (int): number of threads checking variables concurrently, -1 for one per CPU
+            excelMaxRows (int): maximum number of rows per sheet of the Excel report
 
         checkType = 'unallowed' returns:
-            list: variables with inconsistencies in rangeCheck unallowed
+            list: checkResult of variables with inconsistencies in rangeCheck unallowed, indexable as
                 [warn_num][0] = question
                 [warn_num][1] = question and conditions for range
                 [warn_num][2] = data frame for question by  range condition
                 [warn_num][3] = full data frame filtered by range condition
+                data frames are only created when indexed, [warn_num].violations holds the violating rows
         checkType = 'missing' returns:
             list: variables with inconsistencies in rangeCheck missing
                 [warn_num][0] = question
                 [warn_num][1] = question and conditions for range
                 [warn_num][2] = values that were (not) found
         """
+        if checkType not in ("unallowed", "missing"):
+            raise Exception('checkType not recognized -> only "unallowed" and "missing" are available')
+
+        with self.timer.stage(f"rangeCheck({checkType})"):
+            results = [result[checkType] for result in self.rangeCheckGrids((checkType,), nJobs)]
+        outListFailed, outListSuccess = self.collectRangeResults(results, checkType)
+
+        if excelOut == True and checkType == "unallowed":
+            with self.timer.stage("excel report"):
+                excelName = self.wordDocumentPath.with_name(f"RC_{checkType}_{self.wordDocumentPath.stem}.xlsx")
+                report = reportWriter(excelName, excelMaxRows)
+                if len(outListFailed) > 0:
+                    self.writeFindingSheets(report, outListFailed, "Range Condition")
+                else:
+                    message = "rangeCheck unallowed did not find any inconsistencies"
+                    report.writeMessage("Sheet", message, Font(bold=True))
+                report.save()
+
+        if excelOut == True and checkType == "missing":
+            with self.timer.stage("excel report"):
+                excelName = self.wordDocumentPath.with_name(f"RC_{checkType}_{self.wordDocumentPath.stem}.xlsx")
+                report = reportWriter(excelName, excelMaxRows)
+                self.writeMissingValuesSheet(report, "Sheet", outListFailed)
+                report.save()
+
+        if outList == "failed":
+            return outListFailed
+        else:
+            return outListSuccess
+
+    def collectRangeResults(self, results, checkType):
+        """prints the results of rangeCheck and splits them into failed and successful checks
+
+        Args:
+            results (list): (failed, result) of rangeCheck for each variable
+            checkType (string): "unallowed" or "missing"
+
+        Returns:
+            tuple: list of failed and list of successful checks
+        """
         bugCounter = -1
         checkCounter = 0
         outListFailed = []
         outListSuccess = []
-        for var in self.rangeList:
-            try:
-                # creating varlist for potential problemlist output filtering
-                checkCounter += 1
-                singleVar = self.pars.inputToFullString(var, out="variable")  # filtering variable
-                if checkType == "unallowed":
-                    # filtering question by range condition
-                    filt = self.dataframe.eval(var)
-                    # reversed lookup, to see whether there is data although not in range
-                    out = self.dataframe[~filt]
-                    # check whether there are values in variable although not defined in range
-                    if sum(pd.notnull(out[singleVar])) > 0:
-                        bugCounter += 1
-                        print(
-                            f"{bugCounter}: Question '{singleVar}' given range condition '{var}' has unallowed values"
-                        )
-                        outListFailed.append([singleVar, var, out[singleVar].sort_values(), out])
-                    else:
-                        outListSuccess.append([singleVar, var, out[singleVar].sort_values(), out])
+        for failed, result in results:
+            checkCounter += 1
+            if failed:
+                bugCounter += 1
+                if self.log.findings:
+                    self.log.finding(
+                        "%s: Question '%s' given range condition '%s' has %s values",
+                        bugCounter,
+                        result[0],
+                        result[1],
+                        checkType,
+                    )
+                outListFailed.append(result)
+            else:
+                outListSuccess.append(result)
 
-                elif checkType == "missing":
-                    valueList = re.sub("\(|\)", "", var).split("|")
-                    valueNotFoundList = []
-                    valueFoundList = []
+        self.log.summary(
+            "%s out of %s variables showed inconsistencies running rangeCheck(%s)",
+            bugCounter + 1,
+            checkCounter,
+            checkType,
+        )
 
-                    for val in valueList:
-                        # querrying each value of rangelist seperately to assess if values are missing
-                        valBool = self.dataframe.eval(val)
+        return outListFailed, outListSuccess
 
-                        if sum(valBool) == 0:  # check wether the value exists
-                            valueNotFoundList.append(self.pars.singleExpParse(val))
-                        else:
-                            valueFoundList.append(self.pars.singleExpParse(val))
+    def writeFindingSheets(self, report, findings, conditionName, prefix=""):
+        """writes one sheet per finding with the data of the question and its condition next to it
 
-                    if len(valueNotFoundList) != 0:
-                        bugCounter += 1
-                        print(f"{bugCounter}: Question '{singleVar}' given range condition '{var}' has missing values")
-                        outListFailed.append([singleVar, var, valueNotFoundList])
+        Args:
+            report (reportWriter): report to write to
+            findings (list): checkResult of failed range or filter checks
+            conditionName (string): label of the condition, e.g. "Range Condition"
+            prefix (string): prefix of the sheet names
+        """
+        for warning in findings:
+            notes = [(f"{conditionName}: {warning[1]}", Font(color="FF0000", bold=True))]
+            # Excel limits sheet names to 31 characters
+            report.writeFrame(f"{prefix}{warning[0]}"[:31], warning[2], notes)
+
+    def writeMissingValuesSheet(self, report, title, findings):
+        """writes the findings of rangeCheck missing into one sheet
+
+        Args:
+            report (reportWriter): report to write to
+            title (string): sheet name
+            findings (list): [question, range condition, values not found] of failed checks
+        """
+        rows = ([f"{warning[0]}", f"{warning[1]}", f'{", ".join(warning[2])}'] for warning in findings)
+        report.writeRows(title, ["Variable", "Range Condition", "Missing Values"], rows)
+
+    def rangeCheckVariableTypes(self, singleVar, var, compiled, checkTypes):
+        """runs several types of rangeCheck for a single variable
+
+        Args:
+            singleVar (string): variable name
+            var (string): expanded range condition
+            compiled (compiledRange): compiled range condition or None
+            checkTypes (tuple): "unallowed" and / or "missing"
+
+        Returns:
+            dictionary: checkType as keys, (failed, checkResult) for unallowed and
+                (failed, [question, range condition, values (not) found]) for missing as values
+        """
+        try:
+            out = {}
+            with self.timer.stage("rangeCheck", singleVar, var):
+                for checkType in checkTypes:
+                    if checkType == "unallowed":
+                        out[checkType] = self.rangeCheckUnallowed(singleVar, var, compiled)
                     else:
-                        outListSuccess.append([singleVar, var, valueFoundList])
+                        out[checkType] = self.rangeCheckMissing(singleVar, var, compiled)
+
+            return out
 
+        except:
+            raise Exception(f"Failed at the following eval string: {var}")
+
+    def rangeCheckGrids(self, checkTypes, nJobs=1):
+        """runs several types of rangeCheck for all variables, the items of a question grid sharing one range
+        condition as one block
+
+        Args:
+            checkTypes (tuple): "unallowed" and / or "missing"
+            nJobs (int): number of threads checking variables or grids concurrently, -1 for one per CPU
+
+        Returns:
+            list: result of rangeCheckVariableTypes for each variable, in order of self.varnameList
+        """
+        items = list(zip(self.varnameList, self.rangeList, self.compiledRangeList))
+        gridResults = self.mapChecks(
+            lambda positions: self.rangeCheckGrid([items[position] for position in positions], checkTypes),
+            self.rangeGrids,
+            nJobs,
+        )
+
+        out = [None] * len(items)
+        for positions, results in zip(self.rangeGrids, gridResults):
+            for position, result in zip(positions, results):
+                out[position] = result
+
+        return out
+
+    def rangeCheckGrid(self, items, checkTypes):
+        """runs several types of rangeCheck for the items of a question grid sharing one range condition. The range
+        is evaluated on all items at once as a 2-D block, items that are not plain numeric columns are checked one
+        by one.
+
+        Args:
+            items (list): (variable name, expanded range condition, compiled range condition) of each item
+            checkTypes (tuple): "unallowed" and / or "missing"
+
+        Returns:
+            list: result of rangeCheckVariableTypes for each item
+        """
+        if len(items) == 1:
+            return [self.rangeCheckVariableTypes(*items[0], checkTypes)]
+
+        names = [singleVar for singleVar, var, compiled in items]
+        block, missing = gridBlock(self.dataframe, names)
+        if block is None:
+            return [self.rangeCheckVariableTypes(*item, checkTypes) for item in items]
+
+        try:
+            out = [{} for item in items]
+            with self.timer.stage("rangeCheck", f"{names[0]}-{names[-1]}", items[0][1]):
+                if "unallowed" in checkTypes:
+                    allowed = items[0][2].allowedBlock(block, missing)
+                    violating = ~allowed & ~missing
+                    for column, (singleVar, var, compiled) in enumerate(items):
+                        violations = np.flatnonzero(violating[:, column])
+                        result = checkResult(singleVar, var, self.dataframe, allowed[:, column], True, violations)
+                        out[column]["unallowed"] = (result.count > 0, result)
+                if "missing" in checkTypes:
+                    for column, (singleVar, var, compiled) in enumerate(items):
+                        out[column]["missing"] = self.rangeCheckMissing(singleVar, var, compiled)
+
+            return out
+
+        except:
+            raise Exception(f"Failed at the following eval string: {items[0][1]}")
+
+    def rangeCheckUnallowed(self, singleVar, var, compiled):
+        """checks whether a variable has values outside of its range condition
+
+        Returns:
+            tuple: whether the check failed and the checkResult
+        """
+        # filtering question by range condition
+        filt = np.asarray(self.rangeMask(singleVar, var, compiled), dtype=bool)
+        # reversed lookup, to see whether there is data although not in range
+        violations = np.flatnonzero(~filt & ~missingMask(self.dataframe[singleVar]))
+        result = checkResult(singleVar, var, self.dataframe, filt, True, violations)
+        # check whether there are values in variable although not defined in range
+        return result.count > 0, result
+
+    def rangeCheckMissing(self, singleVar, var, compiled):
+        """checks whether all values of the range condition of a variable occur in the data
+
+        Returns:
+            tuple: whether the check failed and [question, range condition, values (not) found]
+        """
+        if self.rangeCompiled(singleVar, compiled):
+            # comparing the observed values of the variable with the declared values in one pass
+            valueNotFoundList, valueFoundList = compiled.findValues(self.dataframe[singleVar])
+        else:
+            valueList = re.sub("\\(|\\)", "", var).split("|")
+            valueNotFoundList = []
+            valueFoundList = []
+            dataframe = restoreReferenced(self.dataframe, var)
+
+            for val in valueList:
+                # querrying each value of rangelist seperately to assess if values are missing
+                valBool = dataframe.eval(val)
+
+                if sum(valBool) == 0:  # check wether the value exists
+                    valueNotFoundList.append(self.pars.singleExpParse(val))
                 else:
-                    raise Exception('checkType not recognized -> only "unallowed" and "missing" are available')
+                    valueFoundList.append(self.pars.singleExpParse(val))
+
+        if len(valueNotFoundList) != 0:
+            return True, [singleVar, var, valueNotFoundList]
+
+        return False, [singleVar, var, valueFoundList]
+
+    def mapChecks(self, function, items, nJobs=1):
+        """applies a check to all items, in batches on a thread pool if nJobs is not 1. The checks are vectorized
+        numpy / numexpr work that releases the GIL, so threads share the data frame and the memoized masks instead
+        of copying them into processes.
+
+        Args:
+            function (callable): check of a single item
+            items (list): items to check, e.g. variables and their conditions
+            nJobs (int): number of threads, -1 for one per CPU
 
+        Returns:
+            list: results in the order of items
+        """
+        if nJobs is not None and nJobs < 0:
+            nJobs = os.cpu_count() or 1
+        if nJobs is None or nJobs <= 1 or len(items) <= 1:
+            return [function(item) for item in items]
+
+        # a few batches per thread keeps the scheduling overhead low while balancing uneven variables
+        batchSize = max(1, -(-len(items) // (nJobs * 4)))
+        batches = [items[start : start + batchSize] for start in range(0, len(items), batchSize)]
+        with ThreadPoolExecutor(max_workers=nJobs) as executor:
+            batchResults = list(executor.map(lambda batch: [function(item) for item in batch], batches))
+
+        return [result for batch in batchResults for result in batch]
+
+    def rangeCompiled(self, singleVar, compiled, dataframe=None):
+        """whether the compiled range of a variable can be used instead of pd.eval on the data frame"""
+        if dataframe is None:
+            dataframe = self.dataframe
+
+        return compiled is not None and compiled.variable == singleVar and compiled.supports(dataframe[singleVar])
+
+    def rangeMask(self, singleVar, var, compiled, dataframe=None):
+        """evaluates the range condition of a variable on the data frame
+
+        Args:
+            singleVar (string): variable name
+            var (string): expanded range condition, used if the range could not be compiled
+            compiled (compiledRange): compiled range condition or None
+            dataframe (pd.DataFrame): data to evaluate, defaults to self.dataframe
+
+        Returns:
+            array like: boolean mask, True where the value of the variable is within the range
+        """
+        if dataframe is None:
+            dataframe = self.dataframe
+
+        if self.rangeCompiled(singleVar, compiled, dataframe):
+            return compiled.allowedMask(dataframe[singleVar])
+
+        return restoreReferenced(dataframe, var).eval(var)
+
+    def dataMaskCache(self):
+        """memoized masks of self.dataframe, renewed if a different data frame was assigned"""
+        if self.maskCache.dataframe is not self.dataframe:
+            self.maskCache = maskCache(self.dataframe)
+
+        return self.maskCache
+
+    def filterMask(self, condition, cache=None):
+        """evaluates a filter condition on the data frame. The condition is parsed into an expression tree once and
+        the masks of all its sub-expressions are memoized, such that conditions shared between filters are only
+        computed once. Conditions the parser does not understand are read with pd.eval.
+        Call self.maskCache.clear() after changing self.dataframe in place.
+
+        Args:
+            condition (string): filter condition, e.g. '(SD26 == 1 | SD26 == 2) & SD27 == 2'
+            cache (maskCache): masks of the data to evaluate, defaults to the masks of self.dataframe
+
+        Returns:
+            array like: boolean mask, True where the filter condition is satisfied
+        """
+        if cache is None:
+            cache = self.dataMaskCache()
+
+        expression = self.filterExpression(condition)
+        if expression is None:
+            return restoreReferenced(cache.dataframe, condition).eval(condition)
+
+        return cache.mask(expression)
+
+    def routeFilters(self, cache=None):
+        """computes the masks of the rows each filter follow question is routed to (its expanded filter condition) in
+        one pass over the filter graph in topological order: the mask of a question is its own filter condition
+        with the comparisons of filter variables joined with their masks. The masks are stored in the cache.
+
+        Args:
+            cache (maskCache): masks of the data to evaluate, defaults to the masks of self.dataframe
+        """
+        if cache is None:
+            cache = self.dataMaskCache()
+
+        with self.timer.stage("route filters"):
+            for condition in self.routedConditions.values():
+                cache.mask(condition)
+
+    def checkedFilterMask(self, key, value, cache, expandedCheck=False):
+        """mask of the filter condition a filter follow question is checked with
+
+        Args:
+            key (string): filter follow question
+            value (string): filter condition or expanded filter condition
+            cache (maskCache): masks of the data to evaluate
+            expandedCheck (bool): whether value is the expanded filter condition, read from the routed mask then
+
+        Returns:
+            np.ndarray: boolean mask, True where the filter condition is satisfied
+        """
+        if expandedCheck and key in self.routedConditions:
+            return cache.mask(self.routedConditions[key])
+
+        return np.asarray(self.filterMask(value, cache), dtype=bool)
+
+    def aggregatedChecks(self, filterMissVal=None):
+        """names of the checks yielded by violationMasks"""
+        if filterMissVal is None:
+            return ("rangeCheck(unallowed)",)
+
+        return ("rangeCheck(unallowed)", "filterCheck(unallowed)", "filterCheck(missing)")
+
+    def violationMasks(self, dataframe, filterMissVal=None, expandedCheck=False):
+        """evaluates the range and filter checks of all variables on a data frame, for the checks that aggregate the
+        violations themselves (e.g. over chunks, deliveries or groups)
+
+        Args:
+            dataframe (pd.DataFrame): data to check
+            filterMissVal (int): value of filter missings, filter checks are skipped if None
+            expandedCheck (bool): whether to use the expanded filter conditions
+
+        Yields:
+            tuple: check name ("rangeCheck(unallowed)", "filterCheck(unallowed)" or "filterCheck(missing)"), variable,
+                range or filter condition and boolean mask of the violating rows
+        """
+        for singleVar, var, compiled in zip(self.varnameList, self.rangeList, self.compiledRangeList):
+            try:
+                filt = np.asarray(self.rangeMask(singleVar, var, compiled, dataframe), dtype=bool)
+                violations = ~filt & ~missingMask(dataframe[singleVar])
             except:
                 raise Exception(f"Failed at the following eval string: {var}")
+            yield "rangeCheck(unallowed)", singleVar, var, violations
 
-        print(
-            f"{bugCounter + 1} out of {checkCounter} variables showed inconsistencies running rangeCheck({checkType})"
-        )
+        if filterMissVal is None:
+            return
 
-        if excelOut == True and checkType == "unallowed":
-            excelName = self.wordDocumentPath.with_name(f"RC_{checkType}_{self.wordDocumentPath.stem}.xlsx")
-            if len(outListFailed) > 0:
-                with pd.ExcelWriter(excelName) as writer:
-                    for warning in outListFailed:
-                        warning[2].to_excel(writer, sheet_name=f"{warning[0]}")
-
-                wb = openpyxl.load_workbook(excelName)
-                for warning in outListFailed:
-                    ws = wb[warning[0]]
-                    d = ws.cell(row=1, column=3, value=f"Range Condition: {warning[1]}")
-                    d.font = Font(color="FF0000", bold=True)
-                wb.save(excelName)
-            else:
-                wb = openpyxl.Workbook()
-                ws = wb.active            
-                d = ws.cell(row=1, column=1, value=f"rangeCheck unallowed did not find any inconsistencies")
-                d.font = Font(bold=True)
-                wb.save(excelName)
+        filterDic = self.expandedFilterDic if expandedCheck else self.filterDic
+        cache = maskCache(dataframe)
+        if expandedCheck:
+            self.routeFilters(cache)
+        for key, value in filterDic.items():
+            try:
+                filt = self.checkedFilterMask(key, value, cache, expandedCheck)
+                isMissing = (dataframe[key] == filterMissVal).to_numpy(dtype=bool, na_value=False)
+            except:
+                raise Exception(f'Failed at the following evaluation: variable "{key}" with filter condition "{value}"')
+            yield "filterCheck(unallowed)", key, value, ~filt & ~isMissing
+            yield "filterCheck(missing)", key, value, filt & isMissing
 
-        if excelOut == True and checkType == "missing":
-            excelName = self.wordDocumentPath.with_name(f"RC_{checkType}_{self.wordDocumentPath.stem}.xlsx")
-
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            d = ws.cell(row=1, column=1, value=f"Variable")
-            d.font = Font(bold=True)
-            d = ws.cell(row=1, column=2, value=f"Range Condition")
-            d.font = Font(bold=True)
-            d = ws.cell(row=1, column=3, value=f"Missing Values")
-            d.font = Font(bold=True)
-
-            rowCount = 2
-            for warning in outListFailed:
-                d = ws.cell(row=rowCount, column=1, value=f"{warning[0]}")
-                d = ws.cell(row=rowCount, column=2, value=f"{warning[1]}")
-                d = ws.cell(row=rowCount, column=3, value=f'{", ".join(warning[2])}')
-                rowCount += 1
-            wb.save(excelName)
+    def streamCheck(self, chunks, filterMissVal=None, expandedCheck=False, sampleSize=10):
+        """Runs rangeCheck and filterCheck on data delivered in chunks (e.g. pd.read_csv(..., chunksize=...)), such
+        that data larger than memory can be checked. Only violation counts, a sample of the violating rows and
+        the values found per variable are kept between chunks.
 
-        if outList == "failed":
-            return outListFailed
+        Args:
+            chunks (iterable): data frames with the same columns
+            filterMissVal (int): value of filter missings, filter checks are skipped if None
+            expandedCheck (bool): whether to use the expanded filter conditions
+            sampleSize (int): maximum number of violating rows kept per variable
+
+        Returns:
+            dictionary: failed checks by check name
+                "rangeCheck(unallowed)": list of streamFinding
+                "rangeCheck(missing)": list of [question, range condition, values not found]
+                "filterCheck(unallowed)": list of streamFinding
+                "filterCheck(missing)": list of streamFinding
+        """
+        rangeVars = self.varnameList
+        findings = OrderedDict((checkName, OrderedDict()) for checkName in self.aggregatedChecks(filterMissVal))
+        observedValues = OrderedDict((singleVar, set()) for singleVar in rangeVars)
+
+        rowCounter = 0
+        for chunk in chunks:
+            rowCounter += len(chunk)
+            for checkName, variable, condition, violations in self.violationMasks(chunk, filterMissVal, expandedCheck):
+                findings[checkName].setdefault(variable, streamFinding(variable, condition, sampleSize))
+                findings[checkName][variable].add(chunk, violations)
+            for singleVar in rangeVars:
+                observedValues[singleVar].update(chunk[singleVar][~missingMask(chunk[singleVar])].unique())
+
+        out = OrderedDict()
+        out["rangeCheck(unallowed)"] = [
+            finding for finding in findings["rangeCheck(unallowed)"].values() if finding.count > 0
+        ]
+        out["rangeCheck(missing)"] = []
+        for singleVar, var, compiled in zip(rangeVars, self.rangeList, self.compiledRangeList):
+            observed = pd.Series(list(observedValues[singleVar]), dtype=object)
+            valueNotFoundList = self.valuesNotObserved(singleVar, var, compiled, observed)
+            if len(valueNotFoundList) != 0:
+                out["rangeCheck(missing)"].append([singleVar, var, valueNotFoundList])
+
+        for checkName in findings:
+            if checkName.startswith("filterCheck"):
+                out[checkName] = [finding for finding in findings[checkName].values() if finding.count > 0]
+
+        for checkName, failed in out.items():
+            self.log.summary(
+                "%s variables showed inconsistencies running %s on %s rows", len(failed), checkName, rowCounter
+            )
+
+        return out
+
+    def valuesNotObserved(self, singleVar, var, compiled, observed):
+        """compares the values observed over several chunks or deliveries with the range condition of a variable
+
+        Args:
+            singleVar (string): variable name
+            var (string): expanded range condition
+            compiled (compiledRange): compiled range condition or None
+            observed (pd.Series): distinct observed values
+
+        Returns:
+            list: values of the range condition that were not observed
+        """
+        observedFrame = pd.DataFrame({singleVar: observed.infer_objects()})
+        if self.rangeCompiled(singleVar, compiled, observedFrame):
+            return compiled.findValues(observedFrame[singleVar])[0]
+
+        return [
+            self.pars.singleExpParse(val)
+            for val in re.sub("\\(|\\)", "", var).split("|")
+            if not observedFrame.eval(val).any()
+        ]
+
+    def incrementalCheck(self, dataframe, idColumn, filterMissVal=None, state=None, expandedCheck=False):
+        """Checks a cumulative data delivery against the state of the previous delivery. Only rows that are new or
+        changed since then (compared by a hash of each row) are checked, rows no longer delivered are dropped from
+        the state. Range and filter conditions only relate values of the same row, so checking the changed rows and
+        merging them into the state gives the same findings as checking the full delivery.
+
+        Args:
+            dataframe (pd.DataFrame): full delivery including the respondent ID column
+            idColumn (string): column identifying respondents
+            filterMissVal (int): value of filter missings, filter checks are skipped if None
+            state (incrementalState): state returned by the previous call, None for the first delivery
+            expandedCheck (bool): whether to use the expanded filter conditions
+
+        Returns:
+            incrementalState: updated state, state.results() gives the findings over all delivered rows
+        """
+        if state is None:
+            state = incrementalState(idColumn, filterMissVal, expandedCheck)
+        elif (state.idColumn, state.filterMissVal, state.expandedCheck) != (idColumn, filterMissVal, expandedCheck):
+            raise Exception("state was created with a different idColumn, filterMissVal or expandedCheck")
+
+        changed, stale, hashes = state.delta(dataframe)
+        state.discard(stale)
+
+        delta = dataframe[changed]
+        deltaIds = delta[idColumn].to_numpy()
+        for checkName, variable, condition, violations in self.violationMasks(delta, filterMissVal, expandedCheck):
+            state.addViolations(checkName, variable, condition, deltaIds[violations])
+
+        # observed values are counted without the sentinels of compacted columns
+        rangeVars = self.varnameList
+        rangeColumns = list(dict.fromkeys(rangeVars))
+        state.add(restoreMissing(delta, rangeColumns).set_index(idColumn)[rangeColumns])
+        state.missing = []
+        for singleVar, var, compiled in zip(rangeVars, self.rangeList, self.compiledRangeList):
+            valueNotFoundList = self.valuesNotObserved(singleVar, var, compiled, state.observedValues(singleVar))
+            if len(valueNotFoundList) != 0:
+                state.missing.append([singleVar, var, valueNotFoundList])
+
+        state.rowHashes = hashes
+
+        removedCounter = len(stale.difference(hashes.index))
+        self.log.summary("%s new or changed rows checked, %s rows no longer delivered", len(delta), removedCounter)
+        for checkName, findings in state.results().items():
+            self.log.summary(
+                "%s variables showed inconsistencies running %s on %s rows", len(findings), checkName, len(hashes)
+            )
+
+        return state
+
+    def batchCheck(self, frames, groupBy=None, filterMissVal=None, expandedCheck=False):
+        """Runs rangeCheck and filterCheck for several waves or countries against the compiled template. Each range
+        and filter condition is evaluated once over the rows of all groups and the violations are counted per group,
+        instead of one full pass per group.
+
+        Args:
+            frames (dictionary or pd.DataFrame): data frames by group name, or one data frame split by groupBy
+            groupBy (string): column holding the group of each row if frames is one data frame
+            filterMissVal (int): value of filter missings, filter checks are skipped if None
+            expandedCheck (bool): whether to use the expanded filter conditions
+
+        Returns:
+            dictionary: data frames with the variables as rows and the groups as columns, by check name
+                "rangeCheck(unallowed)": number of values outside the range condition
+                "rangeCheck(missing)": values of the range condition not found in the group, comma seperated
+                "filterCheck(unallowed)": number of values although the filter condition is not satisfied
+                "filterCheck(missing)": number of filter missings although the filter condition is satisfied
+            cells of variables not in the data frame of a group are missing
+        """
+        if isinstance(frames, pd.DataFrame):
+            if groupBy is None:
+                raise Exception("groupBy is needed to check a single data frame by group")
+            dataframe = frames
+            # rows without a group get the code -1 and are left out
+            codes, groups = pd.factorize(dataframe[groupBy], sort=True)
+            columnsByGroup = [set(dataframe.columns)] * len(groups)
         else:
-            return outListSuccess
+            frames = OrderedDict(frames)
+            groups = pd.Index(list(frames))
+            # the sentinels of compacted columns are kept, or replaced by NaN where the frames disagree
+            dataframe = concatCompacted(list(frames.values()))
+            codes = np.repeat(np.arange(len(frames)), [len(frame) for frame in frames.values()])
+            columnsByGroup = [set(frame.columns) for frame in frames.values()]
+        grouped = codes >= 0
+
+        def groupCounts(violations):
+            return np.bincount(codes[violations & grouped], minlength=len(groups))
+
+        def groupTable(rows, variables, requiredColumns, dtype):
+            table = pd.DataFrame(rows, index=pd.Index(variables, name="Variable"), columns=groups).astype(dtype)
+            # variables missing from the data of a group cannot be checked in that group
+            for position, columns in enumerate(columnsByGroup):
+                absent = [not set(required) <= columns for required in requiredColumns]
+                table.iloc[absent, position] = pd.NA
+
+            return table
 
-    def filterCheck(self, filterMissVal, expandedCheck=False, checkType="unallowed", excelOut=False):
+        out = OrderedDict()
+        with self.timer.stage("batchCheck"):
+            rows = OrderedDict((checkName, []) for checkName in self.aggregatedChecks(filterMissVal))
+            for checkName, variable, condition, violations in self.violationMasks(
+                dataframe, filterMissVal, expandedCheck
+            ):
+                rows[checkName].append(groupCounts(violations))
+
+            missingRows = []
+            for singleVar, var, compiled in zip(self.varnameList, self.rangeList, self.compiledRangeList):
+                # distinct values per group in one pass, then compared with the range condition per group
+                present = ~missingMask(dataframe[singleVar])
+                pairs = pd.DataFrame({"group": codes, "value": dataframe[singleVar].to_numpy()})
+                pairs = pairs[grouped & present].dropna().drop_duplicates()
+                observedByGroup = {code: values for code, values in pairs.groupby("group")["value"]}
+                missingRow = []
+                for code in range(len(groups)):
+                    observed = observedByGroup.get(code, pd.Series([], dtype=object)).reset_index(drop=True)
+                    missingRow.append(", ".join(self.valuesNotObserved(singleVar, var, compiled, observed)))
+                missingRows.append(missingRow)
+
+            rangeColumns = [[singleVar] for singleVar in self.varnameList]
+            unallowedRows = rows["rangeCheck(unallowed)"]
+            out["rangeCheck(unallowed)"] = groupTable(unallowedRows, self.varnameList, rangeColumns, "Int64")
+            out["rangeCheck(missing)"] = groupTable(missingRows, self.varnameList, rangeColumns, object)
+
+            if filterMissVal is not None:
+                filterDic = self.expandedFilterDic if expandedCheck else self.filterDic
+                filterColumns = [[key] + self.filterVariables(value) for key, value in filterDic.items()]
+                for checkName in ("filterCheck(unallowed)", "filterCheck(missing)"):
+                    out[checkName] = groupTable(rows[checkName], list(filterDic), filterColumns, "Int64")
+
+        for checkName, table in out.items():
+            if checkName == "rangeCheck(missing)":
+                failed = table.notna() & (table != "")
+            else:
+                failed = table.fillna(0) > 0
+            for group in groups[failed.any(axis=0).to_numpy()]:
+                self.log.finding(
+                    "Group '%s': %s variables showed inconsistencies running %s", group, failed[group].sum(), checkName
+                )
+            self.log.summary(
+                "%s out of %s groups showed inconsistencies running %s",
+                int(failed.any(axis=0).sum()),
+                len(groups),
+                checkName,
+            )
+
+        return out
+
+    def filterCheckVariableTypes(self, key, value, filterMissVal, checkTypes, cache, expandedCheck=False):
+        """runs several types of filterCheck for a single filter follow question. The filter mask is evaluated once,
+        the unallowed check selects the rows where it is False and the missing check the rows where it is True.
+
+        Args:
+            key (string): filter follow question
+            value (string): filter condition
+            filterMissVal (int): value of filter missings
+            checkTypes (tuple): "unallowed" and / or "missing"
+            cache (maskCache): memoized masks of the data frame
+            expandedCheck (bool): whether value is the expanded filter condition
+
+        Returns:
+            dictionary: checkType as keys and checkResult if the check failed, else None as values
+        """
+        try:
+            # creating varlist for potential problemlist output filtering
+            relevant_vars = list(dict.fromkeys([key] + self.filterVariables(value)))
+
+            # filtering filterfollowquestion by filter condition
+            with self.timer.stage("filterCheck", key, value):
+                filt = self.checkedFilterMask(key, value, cache, expandedCheck)
+                isMissing = (self.dataframe[key] == filterMissVal).to_numpy(dtype=bool, na_value=False)
+
+            out = {}
+            for checkType in checkTypes:
+                out[checkType] = None
+                if checkType == "unallowed":
+                    # reversed lookup, to see whether there is data although filter condition not satisfied
+                    violations = np.flatnonzero(~filt & ~isMissing)
+
+                    # check whether there are values in filterfollowquestion although condition is not satisfied
+                    if len(violations) > 0:
+                        out[checkType] = checkResult(key, value, self.dataframe, filt, True, violations, relevant_vars)
+                else:
+                    # finding rows fitting filtercondition, with missings in the filterfollowquestion
+                    violations = np.flatnonzero(filt & isMissing)
+
+                    # check that there are no missings in a filterfollowquestion given that filter condition is satisfied
+                    if len(violations) > 0:
+                        out[checkType] = checkResult(
+                            key, value, self.dataframe, filt, False, violations, relevant_vars, "first"
+                        )
+
+            return out
+        except:
+            raise Exception(f'Failed at the following evaluation: variable "{key}" with filter condition "{value}"')
+
+    def filterCheckGrids(self, filterDic, filterMissVal, checkTypes, cache, expandedCheck=False, nJobs=1):
+        """runs several types of filterCheck for all filter follow questions, the items of a question grid sharing
+        one filter condition as one block
+
+        Args:
+            filterDic (dictionary): filter or expanded filter conditions by filter follow question
+            filterMissVal (int): value of filter missings
+            checkTypes (tuple): "unallowed" and / or "missing"
+            cache (maskCache): memoized masks of the data frame
+            expandedCheck (bool): whether filterDic holds the expanded filter conditions
+            nJobs (int): number of threads checking variables or grids concurrently, -1 for one per CPU
+
+        Returns:
+            list: result of filterCheckVariableTypes for each filter follow question, in order of filterDic
+        """
+        items = list(filterDic.items())
+        gridResults = self.mapChecks(
+            lambda positions: self.filterCheckGrid(
+                [items[position] for position in positions], filterMissVal, checkTypes, cache, expandedCheck
+            ),
+            self.filterGrids,
+            nJobs,
+        )
+
+        out = [None] * len(items)
+        for positions, results in zip(self.filterGrids, gridResults):
+            for position, result in zip(positions, results):
+                out[position] = result
+
+        return out
+
+    def filterCheckGrid(self, items, filterMissVal, checkTypes, cache, expandedCheck=False):
+        """runs several types of filterCheck for the items of a question grid sharing one filter condition. The
+        filter mask is evaluated once and broadcast over the items as a 2-D block, items that are not plain numeric
+        columns are checked one by one.
+
+        Args:
+            items (list): (filter follow question, filter condition) of each item
+            filterMissVal (int): value of filter missings
+            checkTypes (tuple): "unallowed" and / or "missing"
+            cache (maskCache): memoized masks of the data frame
+            expandedCheck (bool): whether the conditions are the expanded filter conditions
+
+        Returns:
+            list: result of filterCheckVariableTypes for each item
+        """
+        if len(items) == 1:
+            key, value = items[0]
+            return [self.filterCheckVariableTypes(key, value, filterMissVal, checkTypes, cache, expandedCheck)]
+
+        keys = [key for key, value in items]
+        value = items[0][1]
+        block = gridBlock(self.dataframe, keys)[0]
+        if block is None:
+            return [
+                self.filterCheckVariableTypes(key, value, filterMissVal, checkTypes, cache, expandedCheck)
+                for key, value in items
+            ]
+
+        try:
+            filterVariables = self.filterVariables(value)
+            with self.timer.stage("filterCheck", f"{keys[0]}-{keys[-1]}", value):
+                filt = self.checkedFilterMask(keys[0], value, cache, expandedCheck)
+                isMissing = block == filterMissVal
+
+            selections = {"unallowed": ~filt[:, None] & ~isMissing, "missing": filt[:, None] & isMissing}
+            out = [{} for item in items]
+            for checkType in checkTypes:
+                violating = selections[checkType]
+                counts = np.count_nonzero(violating, axis=0)
+                for column, key in enumerate(keys):
+                    out[column][checkType] = None
+                    if counts[column] > 0:
+                        relevant_vars = list(dict.fromkeys([key] + filterVariables))
+                        violations = np.flatnonzero(violating[:, column])
+                        if checkType == "unallowed":
+                            result = checkResult(key, value, self.dataframe, filt, True, violations, relevant_vars)
+                        else:
+                            result = checkResult(
+                                key, value, self.dataframe, filt, False, violations, relevant_vars, "first"
+                            )
+                        out[column][checkType] = result
+
+            return out
+        except:
+            raise Exception(f'Failed at the following evaluation: variable "{keys[0]}" with filter condition "{value}"')
+
+    def filterCheck(
+        self, filterMissVal, expandedCheck=False, checkType="unallowed", excelOut=False, nJobs=1, excelMaxRows=None
+    ):
         # TODO update docstring
         """Evaluates whether there are unallowed values in a filterfollowquestion or
         if there are missings in filterfollowquestion even though a filtercondition is true
 
         Args:
             checkType (string): whether one wants to check for unallowed values or missing values
+            nJobs (int): number of threads checking variables concurrently, -1 for one per CPU
+            excelMaxRows (int): maximum number of rows per sheet of the Excel report
 
         Returns:
-            list: variables where the filterCheck showed inconsistencies
+            list: checkResult of variables where the filterCheck showed inconsistencies, indexable as
                 [warn_num][0] = filter follow question
                 [warn_num][1] = filter questions and conditions for filter follow question
                 [warn_num][2] = data frame for filter and filter follow question filtered by filter condition(s)
                 [warn_num][3] = full data frame filtered by filter condition(s)
+                data frames are only created when indexed, [warn_num].violations holds the violating rows
         """
-        bugCounter = -1
-        checkCounter = 0
-        outList = []
+        if checkType not in ("unallowed", "missing"):
+            raise Exception('checkType not recognized -> only "unallowed" and "missing" are available')
+
         if expandedCheck:
             filterDic = self.expandedFilterDic
         else:
             filterDic = self.filterDic
 
-        for key, value in filterDic.items():
-            try:
-                checkCounter += 1
-                # creating varlist for potential problemlist output filtering
-                varlist = re.findall(r"[(&|;]+\s*[(&|;]*(.*?)\s[!=><]=\s", "|" + str(value))  # filtering variables
-                varlist = list(dict.fromkeys(varlist))  # removing duplicates
-                relevant_vars = [key] + varlist
-
-                # filtering filterfollowquestion by filter condition
-                filt = self.dataframe.eval(value)
-                
-                if checkType == "unallowed":
-                    # reversed lookup, to see whether there is data although filter condition not satisfied
-                    out = self.dataframe[~filt]
-                                    
-                    # check whether there are values in filterfollowquestion although condition is not satisfied
-                    #if sum(pd.isnotnull(out[key])) > 0:
-                    if (out[key] == filterMissVal).sum() != len(out[key]):
-                        bugCounter += 1
-                        print(
-                            f"{bugCounter}: Filter follow question '{key}' given filter condition'{value}' has unallowed values"
-                        )
-                        outList.append(
-                            [
-                                key,
-                                value,
-                                out[relevant_vars].sort_values(by=relevant_vars),
-                                out.sort_values(by=relevant_vars),
-                            ]
-                        )
+        cache = self.dataMaskCache()
+        if expandedCheck:
+            self.routeFilters(cache)
+        with self.timer.stage(f"filterCheck({checkType})"):
+            results = self.filterCheckGrids(filterDic, filterMissVal, (checkType,), cache, expandedCheck, nJobs)
+            results = [result[checkType] for result in results]
+        outList = self.collectFilterResults(results, checkType)
 
-                elif checkType == "missing":
-                    # finding rows fitting filtercondition
-                    out = self.dataframe[filt]
-                    # check that there are no missings in a filterfollowquestion given that filter condition is satisfied
-                    #if sum(pd.isnull(out[key])) > 0:
-                    if (out[key] == filterMissVal).sum() > 0:
-                        bugCounter += 1
-                        print(
-                            f"{bugCounter}: Filter follow question '{key}' given filter condition '{value}' has missing values"
-                        )
-                        outList.append(
-                            [
-                                key,
-                                value,
-                                out[relevant_vars].sort_values(by=relevant_vars, na_position='first'),
-                                out.sort_values(by=relevant_vars),
-                            ]
-                        )
+        if excelOut == True:
+            with self.timer.stage("excel report"):
+                excelName = self.wordDocumentPath.with_name(f"FC_{checkType}_{self.wordDocumentPath.stem}.xlsx")
+                report = reportWriter(excelName, excelMaxRows)
+                if len(outList) > 0:
+                    self.writeFindingSheets(report, outList, "Filtercondition")
                 else:
-                    raise Exception('checkType not recognized -> only "unallowed" and "missing" are available')
-            except:
-                raise Exception(f'Failed at the following evaluation: variable "{key}" with filter condition "{value}"')
+                    message = f"filterCheck {checkType} did not find any inconsistencies"
+                    report.writeMessage("Sheet", message, Font(bold=True))
+                report.save()
 
-        print(
-            f"{bugCounter +1 } out of {checkCounter} variables showed inconsistencies running filterCheck({checkType})"
-        )
+        return outList
 
-        if excelOut == True:
-            excelName = self.wordDocumentPath.with_name(f"FC_{checkType}_{self.wordDocumentPath.stem}.xlsx")
-            if len(outList) > 0:
-                with pd.ExcelWriter(excelName) as writer:
-                    for warning in outList:
-                        warning[2].to_excel(writer, sheet_name=f"{warning[0]}")
-                wb = openpyxl.load_workbook(excelName)
-                for warning in outList:
-                    ws = wb[warning[0]]
-                    d = ws.cell(
-                        row=1,
-                        column=len(warning[2].columns) + 2,
-                        value=f"Filtercondition: {warning[1]}",
+    def collectFilterResults(self, results, checkType):
+        """prints the results of filterCheck and keeps the failed checks
+
+        Args:
+            results (list): checkResult or None of filterCheck for each filter follow question
+            checkType (string): "unallowed" or "missing"
+
+        Returns:
+            list: checkResult of the failed checks
+        """
+        bugCounter = -1
+        checkCounter = 0
+        outList = []
+        for result in results:
+            checkCounter += 1
+            if result is not None:
+                bugCounter += 1
+                if self.log.findings:
+                    self.log.finding(
+                        "%s: Filter follow question '%s' given filter condition '%s' has %s values",
+                        bugCounter,
+                        result[0],
+                        result[1],
+                        checkType,
                     )
-                    d.font = Font(color="FF0000", bold=True)
-                wb.save(excelName)
-            else:
-                wb = openpyxl.Workbook()
-                ws = wb.active            
-                d = ws.cell(row=1, column=1, value=f"filterCheck {checkType} did not find any inconsistencies")
-                d.font = Font(bold=True)
-                wb.save(excelName)
+                outList.append(result)
+
+        self.log.summary(
+            "%s out of %s variables showed inconsistencies running filterCheck(%s)",
+            bugCounter + 1,
+            checkCounter,
+            checkType,
+        )
 
         return outList
+
+    def runAll(self, filterMissVal=None, expandedCheck=False, excelOut=False, nJobs=1, excelMaxRows=None):
+        """Runs varCheck, rangeCheck (unallowed and missing) and filterCheck (unallowed and missing) in one go. Each
+        range and filter condition is evaluated once per variable and its mask is shared by both check types: the
+        unallowed check selects the rows outside the mask and the missing check the rows inside it.
+
+        Args:
+            filterMissVal (int): value of filter missings, filter checks are skipped if None
+            expandedCheck (bool): whether to use the expanded filter conditions
+            excelOut (bool): whether to write one consolidated Excel report (AC_<template name>.xlsx)
+            nJobs (int): number of threads checking variables concurrently, -1 for one per CPU
+            excelMaxRows (int): maximum number of rows per sheet of the Excel report
+
+        Returns:
+            dictionary: results by check name
+                "varCheck": result of varCheck
+                "rangeCheck(unallowed)": list of checkResult, as returned by rangeCheck
+                "rangeCheck(missing)": list of [question, range condition, values not found]
+                "filterCheck(unallowed)": list of checkResult, as returned by filterCheck
+                "filterCheck(missing)": list of checkResult, as returned by filterCheck
+        """
+        checkTypes = ("unallowed", "missing")
+        out = OrderedDict()
+        out["varCheck"] = self.varCheck()
+
+        with self.timer.stage("rangeCheck(unallowed, missing)"):
+            rangeResults = self.rangeCheckGrids(checkTypes, nJobs)
+        for checkType in checkTypes:
+            results = [result[checkType] for result in rangeResults]
+            out[f"rangeCheck({checkType})"] = self.collectRangeResults(results, checkType)[0]
+
+        if filterMissVal is not None:
+            filterDic = self.expandedFilterDic if expandedCheck else self.filterDic
+            cache = self.dataMaskCache()
+            if expandedCheck:
+                self.routeFilters(cache)
+            with self.timer.stage("filterCheck(unallowed, missing)"):
+                filterResults = self.filterCheckGrids(filterDic, filterMissVal, checkTypes, cache, expandedCheck, nJobs)
+            for checkType in checkTypes:
+                results = [result[checkType] for result in filterResults]
+                out[f"filterCheck({checkType})"] = self.collectFilterResults(results, checkType)
+
+        if excelOut == True:
+            with self.timer.stage("excel report"):
+                excelName = self.wordDocumentPath.with_name(f"AC_{self.wordDocumentPath.stem}.xlsx")
+                report = reportWriter(excelName, excelMaxRows)
+                header = ["Check", "Variable", "Condition", "Inconsistencies"]
+                report.writeRows("Summary", header, self.summaryRows(out))
+                self.writeMissingValuesSheet(report, "rangeCheck(missing)", out["rangeCheck(missing)"])
+                self.writeFindingSheets(report, out["rangeCheck(unallowed)"], "Range Condition", "RC ")
+                if filterMissVal is not None:
+                    self.writeFindingSheets(report, out["filterCheck(unallowed)"], "Filtercondition", "FCu ")
+                    self.writeFindingSheets(report, out["filterCheck(missing)"], "Filtercondition", "FCm ")
+                report.save()
+
+        return out
+
+    def summaryRows(self, results):
+        """rows of the summary sheet of the runAll report, one per inconsistency found
+
+        Args:
+            results (dictionary): results of runAll
+
+        Yields:
+            list: check name, variable, condition and a description of the inconsistency
+        """
+        for varname in results["varCheck"]["In Document only"]:
+            yield ["varCheck", varname, None, "only in document"]
+        for varname in results["varCheck"]["In Dataframe only"]:
+            yield ["varCheck", varname, None, "only in dataframe"]
+        for checkName, findings in results.items():
+            if checkName == "varCheck":
+                continue
+            for finding in findings:
+                if checkName == "rangeCheck(missing)":
+                    yield [checkName, finding[0], finding[1], f'values not found: {", ".join(finding[2])}']
+                else:
+                    yield [checkName, finding.variable, finding.condition, f"{finding.count} rows"]
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from surveychecks.surveychecks import surveychecks
+
+template = """(Va:
+q1 == 1-5 + -95
+Vb:)
+(Va:
+q2 == 1, 2 + -55; q1 == 1-3
+Vb:)
+(Va:
+q3 == 0-10 + -55; q2 == 1
+Vb:)
+"""
+
+
+def surveyFrame(rows, seed):
+    rng = np.random.default_rng(seed)
+    q1 = rng.choice([1, 2, 3, 4, 5, 6, -95], rows).astype(float)
+    q1[rng.random(rows) < 0.1] = np.nan
+    q2 = np.where(np.isin(q1, [1, 2, 3]), rng.choice([1, 2, 3], rows), -55).astype(float)
+    q2[rng.random(rows) < 0.1] = np.nan
+    q3 = np.where(q2 == 1, rng.integers(0, 12, rows), -55).astype(float)
+    q3[rng.random(rows) < 0.05] = -55
+    q3[rng.random(rows) < 0.1] = np.nan
+
+    return pd.DataFrame({"q1": q1, "q2": q2, "q3": q3})
+
+
+@pytest.fixture
+def checker(tmp_path):
+    templatePath = tmp_path / "template.txt"
+    templatePath.write_text(template, encoding="utf-8")
+
+    return surveychecks(None, templatePath, useCache=False, verbosity="quiet")
+
+
+def compacted(checker, dataframe):
+    checker.dataframe = dataframe
+    return checker.compactDataframe(filterMissVal=-55)
+
+
+def assertSameTables(expected, result):
+    assert list(expected) == list(result)
+    for checkName in expected:
+        pd.testing.assert_frame_equal(expected[checkName], result[checkName])
+
+
+@pytest.mark.parametrize("expandedCheck", [False, True])
+def test_compacted_frames(checker, expandedCheck):
+    frames = {"wave1": surveyFrame(500, 1), "wave2": surveyFrame(400, 2)}
+    # a value missing from the range of a group and a column compacted to different dtypes in the groups
+    frames["wave2"].loc[frames["wave2"]["q1"] == 5, "q1"] = 4
+    frames["wave2"].loc[0, "q3"] = 300
+    expected = checker.batchCheck(frames, filterMissVal=-55, expandedCheck=expandedCheck)
+
+    compactFrames = {group: compacted(checker, frame) for group, frame in frames.items()}
+    assert all(len(frame.attrs["missingSentinels"]) == 3 for frame in compactFrames.values())
+    result = checker.batchCheck(compactFrames, filterMissVal=-55, expandedCheck=expandedCheck)
+
+    assertSameTables(expected, result)
+
+
+def test_partly_compacted_frames(checker):
+    frames = {"wave1": surveyFrame(500, 1), "wave2": surveyFrame(400, 2)}
+    expected = checker.batchCheck(frames, filterMissVal=-55)
+
+    # only one frame compacted, the sentinels of its columns are not shared by the other frame
+    compactFrames = {"wave1": compacted(checker, frames["wave1"]), "wave2": frames["wave2"]}
+    result = checker.batchCheck(compactFrames, filterMissVal=-55)
+
+    assertSameTables(expected, result)
+
+
+def test_compacted_groups(checker):
+    dataframe = surveyFrame(900, 3)
+    dataframe["country"] = np.random.default_rng(4).choice(["DE", "FR", "IT"], len(dataframe))
+    expected = checker.batchCheck(dataframe, groupBy="country", filterMissVal=-55)
+
+    result = checker.batchCheck(compacted(checker, dataframe), groupBy="country", filterMissVal=-55)
+
+    assertSameTables(expected, result)
@@ -0,0 +1,95 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from surveychecks.helper.parser import parser
+
+conditions = [
+    "x == 18-25 + -95",
+    "x == 1, 2 + -55",
+    "x == 1-3 | x == 7",
+    "(x >= 0 & x <= 500) | x == -95, -55",
+    "(x >= 1 & x < 5) | x == -95",
+    "x < 0 | x >= 10",
+    "x > 3",
+]
+
+values = [-95, -55, -9, 0, 1, 1.5, 2, 3, 4, 4.5, 5, 7, 10, 18, 20, 25, 26, 500, 501]
+
+
+def column(dtype):
+    if dtype == "int64":
+        return pd.Series([value for value in values if value == int(value)], dtype=dtype)
+    if dtype == "Int64":
+        return pd.Series([value for value in values if value == int(value)] + [None], dtype=dtype)
+
+    return pd.Series(values + [np.nan], dtype=dtype)
+
+
+def evalMask(expanded, series):
+    result = pd.DataFrame({"x": series}).eval(expanded)
+
+    return pd.Series(result).to_numpy(dtype=bool, na_value=False)
+
+
+@pytest.mark.parametrize(
+    "condition, expected",
+    [
+        ("x == 18-25 + -95", ((), ((18, 25, True, True, True),), (-95,))),
+        ("x == 1, 2 + -55", ((1, 2), (), (-55,))),
+        ("(x >= 0 & x <= 500) | x == -95, -55", ((-95, -55), ((0, 500, True, True, False),), ())),
+        ("x < 0 | x >= 10", ((), ((None, 0, True, False, False), (10, None, True, True, False)), ())),
+    ],
+)
+def test_parse_range(condition, expected):
+    compiled, expanded = parser().parseRange(condition)
+
+    assert compiled.variable == "x"
+    assert (compiled.values, compiled.intervals, compiled.missings) == expected
+
+
+@pytest.mark.parametrize("condition", ["x == 1 | y == 2", "x != 3", "x == 1.5, 2 + -9"])
+def test_uncompiled_range(condition):
+    assert parser().parseRange(condition) == (None, None)
+
+
+@pytest.mark.parametrize("dtype", ["float64", "int64", "Int64"])
+@pytest.mark.parametrize("condition", conditions)
+def test_allowed_mask_matches_eval(condition, dtype):
+    compiled, expanded = parser().parseRange(condition)
+    series = column(dtype)
+
+    assert compiled.supports(series)
+    np.testing.assert_array_equal(compiled.allowedMask(series), evalMask(expanded, series))
+
+
+@pytest.mark.parametrize("condition", conditions)
+def test_allowed_block_matches_allowed_mask(condition):
+    compiled, expanded = parser().parseRange(condition)
+    block = np.column_stack([column("float64"), column("float64")[::-1]])
+
+    expected = np.column_stack([compiled.allowedMask(pd.Series(block[:, item])) for item in range(2)])
+    np.testing.assert_array_equal(compiled.allowedBlock(block, np.isnan(block)), expected)
+
+
+@pytest.mark.parametrize("dtype", ["float64", "int64", "Int64"])
+@pytest.mark.parametrize("condition", ["x == 18-25 + -95", "x == 1, 2 + -55", "x == 1-3 | x == 7", "x == 0-4 + -9"])
+def test_find_values_matches_eval(condition, dtype):
+    pars = parser()
+    compiled, expanded = pars.parseRange(condition)
+    series = column(dtype)
+
+    terms = re.sub("\\(|\\)", "", expanded).split("|")
+    notFound = [pars.singleExpParse(term) for term in terms if not evalMask(term, series).any()]
+    found = [pars.singleExpParse(term) for term in terms if evalMask(term, series).any()]
+
+    assert sorted(compiled.findValues(series)[0]) == sorted(notFound)
+    assert sorted(compiled.findValues(series)[1]) == sorted(found)
+
+
+def test_find_values_of_intervals():
+    compiled, expanded = parser().parseRange("(x >= 0 & x <= 500) | x < -100 | x == -95, -55")
+
+    assert compiled.findValues(pd.Series([3.5, -55.0, np.nan])) == (["<-100", "-95"], ["0-500", "-55"])
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from surveychecks.helper.filterExpression import comparison, maskCache
+from surveychecks.helper.parser import parser
+
+expressions = [
+    "a == 1 | b == 2 & c == 3",
+    "(a == 1 | b == 2) & c == 3",
+    "a == 1 & (b == 2 | (c == 3 & a == 2))",
+    "a == 1 | a == 2 | a == 3 | b != 3",
+    "(a == 1 | a == 2) & (b >= 2 | c < 2) | a == 5",
+    "c == 1 | c == 2 | c == 4 & a > 2",
+    "d == 'x' | d == 'y' & a <= 3",
+]
+
+
+def expressionFrame(rows, seed):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 6, rows).astype(float)
+    a[rng.random(rows) < 0.1] = np.nan
+    c = pd.array(rng.integers(1, 5, rows), dtype="Int64")
+    c[rng.random(rows) < 0.1] = None
+
+    return pd.DataFrame(
+        {"a": a, "b": rng.integers(1, 4, rows), "c": c, "d": rng.choice(["x", "y", "z"], rows).astype(object)}
+    )
+
+
+def selectedRows(dataframe, condition):
+    """rows selected by boolean indexing with the pd.eval mask, NA rows are dropped"""
+    return dataframe.index.isin(dataframe[dataframe.eval(condition)].index)
+
+
+@pytest.mark.parametrize("operator", ["==", "!=", ">=", "<=", ">", "<"])
+def test_nullable_missing_satisfies_no_comparison(operator):
+    dataframe = pd.DataFrame({"SD27": pd.array([1, None, 2, 3], dtype="Int64")})
+
+    mask = maskCache(dataframe).mask(comparison("SD27", operator, 2))
+
+    assert not mask[1]
+    np.testing.assert_array_equal(mask, selectedRows(dataframe, f"SD27 {operator} 2"))
+
+
+def test_nullable_boolean_missing_satisfies_no_comparison():
+    dataframe = pd.DataFrame({"SD30": pd.array([True, None, False], dtype="boolean")})
+
+    for operator in ("==", "!="):
+        mask = maskCache(dataframe).mask(comparison("SD30", operator, True))
+        assert not mask[1]
+
+
+def test_float_nan_compares_like_pandas():
+    dataframe = pd.DataFrame({"SD27": [1.0, np.nan, 2.0]})
+
+    for operator in ("==", "!=", ">"):
+        mask = maskCache(dataframe).mask(comparison("SD27", operator, 1))
+        np.testing.assert_array_equal(mask, selectedRows(dataframe, f"SD27 {operator} 1"))
+
+
+@pytest.mark.parametrize(
+    "condition, expected",
+    [
+        ("a == 1 | b == 2 & c == 3", "(a == 1 | (b == 2 & c == 3))"),
+        ("a == 1 & b == 2 | c == 3", "((a == 1 & b == 2) | c == 3)"),
+        ("(a == 1 | b == 2) & c == 3", "((a == 1 | b == 2) & c == 3)"),
+        ("a == 1 & (b == 2 & c == 3)", "(a == 1 & b == 2 & c == 3)"),
+        ("((a == 1))", "a == 1"),
+        ("a == 1 & (b == 2 | (c == 3 & a == 2))", "(a == 1 & (b == 2 | (c == 3 & a == 2)))"),
+    ],
+)
+def test_parse_expression_precedence(condition, expected):
+    assert str(parser().parseExpression(condition)) == expected
+
+
+@pytest.mark.parametrize("condition", ["a + 1 == 2", "(a == 1", "a == 1)", "a.isna()", "a == 1 &"])
+def test_parse_expression_unsupported(condition):
+    assert parser().parseExpression(condition) is None
+
+
+@pytest.mark.parametrize("condition", expressions)
+def test_expression_matches_eval(condition):
+    dataframe = expressionFrame(400, 1)
+
+    mask = maskCache(dataframe).mask(parser().parseExpression(condition))
+
+    np.testing.assert_array_equal(mask, selectedRows(dataframe, condition))
+
+
+def test_equalities_are_grouped_to_membership():
+    dataframe = expressionFrame(400, 2)
+    cache = maskCache(dataframe)
+
+    mask = cache.mask(parser().parseExpression("a == 1 | b == 2 | a == 3 | c == 4 | c == 1"))
+
+    assert "a in (1, 3)" in cache.masks and "c in (4, 1)" in cache.masks
+    assert "a == 1" not in cache.masks
+    np.testing.assert_array_equal(mask, selectedRows(dataframe, "a == 1 | b == 2 | a == 3 | c == 4 | c == 1"))
+
+
+def test_shared_subexpressions_are_cached():
+    dataframe = expressionFrame(100, 3)
+    cache = maskCache(dataframe, maxEntries=3)
+    first = parser().parseExpression("b == 2 & a > 2")
+    second = parser().parseExpression("(b == 2 & a > 2) | d == 'x'")
+
+    cache.mask(first)
+    cache.mask(second)
+
+    assert list(cache.masks) == ["(b == 2 & a > 2)", "d == 'x'", "((b == 2 & a > 2) | d == 'x')"]
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from surveychecks.surveychecks import surveychecks
+
+template = """(Va:
+q1 == 1-5 + -95
+Vb:)
+(Va:
+q2 == 1, 2 + -55; q1 == 1-3
+Vb:)
+(Va:
+q3 == 0-10 + -55; q2 == 1
+Vb:)
+"""
+
+
+def surveyFrame(rows, seed):
+    rng = np.random.default_rng(seed)
+    q1 = rng.choice([1, 2, 3, 4, 5, 6, -95], rows).astype(float)
+    q2 = np.where(np.isin(q1, [1, 2, 3]), rng.choice([1, 2, 3], rows), -55).astype(float)
+    q2[rng.random(rows) < 0.1] = np.nan
+    q3 = np.where(q2 == 1, rng.integers(0, 12, rows), -55).astype(float)
+    q3[rng.random(rows) < 0.05] = -55
+
+    return pd.DataFrame({"id": np.arange(rows) + 1000, "q1": q1, "q2": q2, "q3": q3})
+
+
+@pytest.fixture
+def checker(tmp_path):
+    templatePath = tmp_path / "template.txt"
+    templatePath.write_text(template, encoding="utf-8")
+
+    return surveychecks(None, templatePath, useCache=False, verbosity="quiet")
+
+
+def checkedRows(checker, monkeypatch):
+    """records the number of rows passed to violationMasks by each call"""
+    rows = []
+    violationMasks = checker.violationMasks
+
+    def recordingMasks(dataframe, *args, **kwargs):
+        rows.append(len(dataframe))
+        return violationMasks(dataframe, *args, **kwargs)
+
+    monkeypatch.setattr(checker, "violationMasks", recordingMasks)
+
+    return rows
+
+
+def violatingIds(state, checkName, variable):
+    return next((ids for question, condition, ids in state.results()[checkName] if question == variable), [])
+
+
+def test_deliveries_match_full_check(checker):
+    first = surveyFrame(600, 1)
+    second = pd.concat([first.iloc[50:], surveyFrame(200, 2).assign(id=lambda frame: frame["id"] + 600)])
+    second.loc[second["id"] == 1100, "q1"] = 6
+    second.loc[second["id"] == 1200, "q3"] = 300
+
+    state = checker.incrementalCheck(first, "id", filterMissVal=-55)
+    state = checker.incrementalCheck(second, "id", filterMissVal=-55, state=state)
+    fresh = checker.incrementalCheck(second, "id", filterMissVal=-55)
+
+    assert state.results() == fresh.results()
+
+
+def test_changed_row_is_rechecked(checker):
+    first = surveyFrame(300, 3)
+    first.loc[first["id"] == 1010, ["q1", "q2", "q3"]] = [1, 1, 5]
+    state = checker.incrementalCheck(first, "id", filterMissVal=-55)
+    assert 1010 not in violatingIds(state, "rangeCheck(unallowed)", "q3")
+
+    second = first.copy()
+    second.loc[second["id"] == 1010, "q3"] = 300
+    state = checker.incrementalCheck(second, "id", filterMissVal=-55, state=state)
+    assert 1010 in violatingIds(state, "rangeCheck(unallowed)", "q3")
+
+    state = checker.incrementalCheck(first, "id", filterMissVal=-55, state=state)
+    assert 1010 not in violatingIds(state, "rangeCheck(unallowed)", "q3")
+    assert state.results() == checker.incrementalCheck(first, "id", filterMissVal=-55).results()
+
+
+def test_unchanged_rows_are_reused(checker, monkeypatch):
+    first = surveyFrame(400, 4)
+    state = checker.incrementalCheck(first, "id", filterMissVal=-55)
+    expected = state.results()
+
+    rows = checkedRows(checker, monkeypatch)
+    state = checker.incrementalCheck(first.sample(frac=1, random_state=5), "id", filterMissVal=-55, state=state)
+    assert rows == [0]
+    assert state.results() == expected
+
+    second = first.copy()
+    second.loc[second["id"].isin([1001, 1002]), "q1"] = 6
+    state = checker.incrementalCheck(second, "id", filterMissVal=-55, state=state)
+    assert rows == [0, 2]
+
+
+def test_missing_id_column(checker):
+    with pytest.raises(Exception, match='ID column "respondent" not found'):
+        checker.incrementalCheck(surveyFrame(10, 6), "respondent", filterMissVal=-55)
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from surveychecks.helper.questionGrid import gridStem, gridUnits
+from surveychecks.surveychecks import surveychecks
+
+items = 6
+
+template = "\n".join(
+    ["(Va:\nF == 1-3 + -95\nVb:)"]
+    + [f"(Va:\nQ_{item} == 1-5 + -95, -55; F == 1 | F == 2\nVb:)" for item in range(1, items + 1)]
+    + [f"(Va:\nR_{item} >= 0 & R_{item} <= 100 | R_{item} == -95; F == 3\nVb:)" for item in range(1, items + 1)]
+    + ["(Va:\nZ_1 == 1, 2; F == 1\nVb:)", "(Va:\nZ_2 == 1-3; F == 1\nVb:)"]
+)
+
+
+def gridFrame(rows, seed):
+    rng = np.random.default_rng(seed)
+    dataframe = pd.DataFrame({"F": rng.integers(1, 4, rows)})
+    for item in range(1, items + 1):
+        values = rng.integers(1, 7, rows).astype(float)
+        values[dataframe["F"].to_numpy() == 3] = -55
+        values[rng.random(rows) < 0.02] = np.nan
+        dataframe[f"Q_{item}"] = values
+        values = rng.integers(0, 102, rows)
+        values[dataframe["F"].to_numpy() != 3] = -55
+        values[rng.random(rows) < 0.02] = 5
+        dataframe[f"R_{item}"] = values
+    dataframe["Z_1"] = rng.integers(1, 3, rows)
+    dataframe["Z_2"] = rng.integers(1, 4, rows)
+
+    return dataframe
+
+
+@pytest.fixture
+def checker(tmp_path):
+    templatePath = tmp_path / "template.txt"
+    templatePath.write_text(template, encoding="utf-8")
+
+    return surveychecks(gridFrame(800, 1), templatePath, useCache=False, verbosity="quiet")
+
+
+def summary(results):
+    return [
+        (result[0], result[1], np.asarray(result.violations).tolist())
+        if hasattr(result, "violations")
+        else (result[0], result[1], list(result[2]))
+        for result in results
+    ]
+
+
+def allChecks(checker):
+    out = {}
+    for checkType in ("unallowed", "missing"):
+        for outList in ("failed", "success"):
+            out["rangeCheck", checkType, outList] = summary(checker.rangeCheck(checkType, outList=outList))
+        for expandedCheck in (False, True):
+            out["filterCheck", checkType, expandedCheck] = summary(checker.filterCheck(-55, expandedCheck, checkType))
+
+    return out
+
+
+def itemByItem(checker):
+    checker.rangeGrids = [(position,) for position in range(len(checker.varnameList))]
+    checker.filterGrids = [(position,) for position in range(len(checker.filterDic))]
+
+
+def test_grid_stem():
+    assert gridStem("SD29A_12") == "SD29A"
+    assert gridStem("Q_1_2") == "Q_1"
+    assert gridStem("SD29A") is None
+    assert gridStem("SD29A_x") is None
+
+
+def test_grid_units():
+    names = ["F", "Q_1", "Q_2", "Z_1", "Q_3", "Z_2", "R_1"]
+    signatures = ["a", "b", "b", "b", "b", "b", None]
+
+    assert gridUnits(names, signatures) == [(0,), (1, 2, 4), (3, 5), (6,)]
+    assert gridUnits(names, signatures, minItems=4) == [(0,), (1,), (2,), (3,), (4,), (5,), (6,)]
+
+
+def test_template_grids(checker):
+    rangeGrids = [tuple(checker.varnameList[position] for position in unit) for unit in checker.rangeGrids]
+    filterNames = list(checker.filterDic)
+    filterGrids = [tuple(filterNames[position] for position in unit) for unit in checker.filterGrids]
+
+    assert tuple(f"Q_{item}" for item in range(1, items + 1)) in rangeGrids
+    # the range conditions of the R items name each item and are compiled to the same intervals
+    assert tuple(f"R_{item}" for item in range(1, items + 1)) in rangeGrids
+    assert ("Z_1",) in rangeGrids and ("Z_2",) in rangeGrids
+    assert ("Z_1", "Z_2") in filterGrids
+
+
+def test_grids_match_item_checks(checker):
+    expected = allChecks(checker)
+    assert any(len(findings) > 0 for findings in expected.values())
+
+    itemByItem(checker)
+
+    assert allChecks(checker) == expected
+
+
+def test_compacted_grids_match_item_checks(checker):
+    itemByItem(checker)
+    expected = allChecks(checker)
+
+    checker.rangeGrids, checker.filterGrids = checker.makeGrids()
+    checker.compactDataframe(filterMissVal=-55)
+
+    assert allChecks(checker) == expected
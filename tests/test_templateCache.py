@@ -0,0 +1,78 @@
+import pytest
+
+import surveychecks.helper.templateCache as templateCacheModule
+from surveychecks.helper.templateCache import templateCache
+from surveychecks.surveychecks import surveychecks
+
+template = """(Va:
+q1 == 1-5 + -95
+Vb:)
+(Va:
+q2 == 1, 2 + -55; q1 == 1-3
+Vb:)
+"""
+
+
+@pytest.fixture
+def templatePath(tmp_path):
+    templatePath = tmp_path / "template.txt"
+    templatePath.write_text(template, encoding="utf-8")
+
+    return templatePath
+
+
+def test_key_of_same_content(tmp_path, templatePath):
+    cache = templateCache(tmp_path / "cache")
+    copyPath = tmp_path / "copy.txt"
+    copyPath.write_bytes(templatePath.read_bytes())
+
+    assert cache.key(templatePath, "all") == cache.key(copyPath, "all")
+
+
+def test_key_changes_with_content(tmp_path, templatePath):
+    cache = templateCache(tmp_path / "cache")
+    key = cache.key(templatePath, "all")
+
+    templatePath.write_text(template.replace("1-5", "1-6"), encoding="utf-8")
+
+    assert cache.key(templatePath, "all") != key
+
+
+def test_key_changes_with_info_in(tmp_path, templatePath):
+    cache = templateCache(tmp_path / "cache")
+
+    assert cache.key(templatePath, "all") != cache.key(templatePath, "tables")
+
+
+def test_key_changes_with_version(tmp_path, templatePath, monkeypatch):
+    cache = templateCache(tmp_path / "cache")
+    key = cache.key(templatePath, "all")
+    latestPath = cache.latestPath(templatePath, "all")
+
+    monkeypatch.setattr(templateCacheModule, "__version__", "0.0.0+other")
+
+    assert cache.key(templatePath, "all") != key
+    assert cache.latestPath(templatePath, "all") != latestPath
+
+
+def test_changed_document_is_compiled_again(tmp_path, templatePath):
+    checker = surveychecks(None, templatePath, cacheDir=tmp_path / "cache", verbosity="quiet")
+    assert checker.rangeList[0] == "(q1 == 1 | q1 == 2 | q1 == 3 | q1 == 4 | q1 == 5) | q1 == -95"
+
+    templatePath.write_text(template.replace("1-5 + -95", "1-2 + -95"), encoding="utf-8")
+    checker = surveychecks(None, templatePath, cacheDir=tmp_path / "cache", verbosity="quiet")
+
+    assert checker.rangeList[0] == "(q1 == 1 | q1 == 2) | q1 == -95"
+
+
+def test_latest_key_is_only_written_when_changed(tmp_path, templatePath):
+    cache = templateCache(tmp_path / "cache")
+    key = cache.key(templatePath, "all")
+    cache.saveLatest(templatePath, "all", key)
+    latestPath = cache.latestPath(templatePath, "all")
+    written = latestPath.stat()
+
+    cache.saveLatest(templatePath, "all", key)
+
+    assert cache.latestKey(templatePath, "all") == key
+    assert (latestPath.stat().st_ino, latestPath.stat().st_mtime_ns) == (written.st_ino, written.st_mtime_ns)
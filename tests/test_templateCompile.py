@@ -0,0 +1,98 @@
+import pytest
+
+from surveychecks.helper.parser import parser
+from surveychecks.surveychecks import surveychecks
+
+variableLines = [
+    "q1 == 1-5 + -95",
+    "q2 == 1, 2 + -55; q1 == 1-3",
+    "q3 == 0-10 + -55; q2 == 1",
+    "q4 == 1-4 + -55; q3 == 1-5 | q2 == 2",
+    "q5 == 1, 2 + -55; q4 == 1",
+    "q6 == 1-3 + -55; q1 == 5",
+]
+
+
+def templateText(lines):
+    return "\n".join(f"(Va:\n{line}\nVb:)" for line in lines) + "\n"
+
+
+def compiledAttributes(checker):
+    return {
+        "varlist": checker.varlist,
+        "variableLines": [
+            (
+                line.line,
+                line.name,
+                line.rangeCondition,
+                line.expandedRange,
+                repr(line.compiledRange),
+                line.filterCondition,
+            )
+            for line in checker.variableLines
+        ],
+        "varnameList": checker.varnameList,
+        "rangeList": checker.rangeList,
+        "compiledRangeList": [repr(compiled) for compiled in checker.compiledRangeList],
+        "filterDic": checker.filterDic,
+        "expandedFilterDic": checker.expandedFilterDic,
+        "expandedFilterExpressions": {key: str(value) for key, value in checker.expandedFilterExpressions.items()},
+        "filterOrder": checker.filterGraph.order,
+        "allFilterDicConditions": checker.allFilterDicConditions,
+    }
+
+
+@pytest.fixture
+def parsedLines(monkeypatch):
+    """records the variable lines parsed by the parser"""
+    lines = []
+    parseLine = parser.parseLine
+
+    def recordingParseLine(self, line):
+        lines.append(line)
+        return parseLine(self, line)
+
+    monkeypatch.setattr(parser, "parseLine", recordingParseLine)
+
+    return lines
+
+
+@pytest.mark.parametrize(
+    "edit",
+    [
+        lambda lines: lines[:2] + ["q3 == 0-12 + -55; q2 == 1"] + lines[3:],
+        lambda lines: lines[:2] + ["q3 == 0-10 + -55; q2 == 2"] + lines[3:],
+        lambda lines: lines[:4] + ["q7 == 1-2; q4 == 2"] + lines[4:],
+        lambda lines: lines[:3] + lines[4:],
+        lambda lines: lines[::-1],
+    ],
+    ids=["range", "filter", "insert", "delete", "reorder"],
+)
+def test_recompile_matches_fresh_compile(tmp_path, parsedLines, edit):
+    templatePath = tmp_path / "template.txt"
+    cacheDir = tmp_path / "cache"
+    templatePath.write_text(templateText(variableLines), encoding="utf-8")
+    surveychecks(None, templatePath, cacheDir=cacheDir, verbosity="quiet")
+
+    editedLines = edit(variableLines)
+    templatePath.write_text(templateText(editedLines), encoding="utf-8")
+    parsedLines.clear()
+    recompiled = surveychecks(None, templatePath, cacheDir=cacheDir, verbosity="quiet")
+    assert set(parsedLines) == set(editedLines) - set(variableLines)
+
+    fresh = surveychecks(None, templatePath, useCache=False, verbosity="quiet")
+
+    assert compiledAttributes(recompiled) == compiledAttributes(fresh)
+
+
+def test_unchanged_template_is_not_parsed(tmp_path, parsedLines):
+    templatePath = tmp_path / "template.txt"
+    templatePath.write_text(templateText(variableLines), encoding="utf-8")
+    fresh = surveychecks(None, templatePath, cacheDir=tmp_path / "cache", verbosity="quiet")
+    assert parsedLines == variableLines
+
+    parsedLines.clear()
+    cached = surveychecks(None, templatePath, cacheDir=tmp_path / "cache", verbosity="quiet")
+
+    assert parsedLines == []
+    assert compiledAttributes(cached) == compiledAttributes(fresh)
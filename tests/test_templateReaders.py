@@ -0,0 +1,26 @@
+import pytest
+
+from surveychecks.helper.parser import parser
+from surveychecks.helper.templateReaders import variableLineText
+
+
+@pytest.mark.parametrize(
+    "rangeCondition, expected",
+    [
+        ("1-5 + -95", "SD28 == 1-5 + -95"),
+        ("== 1, 2", "SD28 == 1, 2"),
+        (">= 0 & <= 5", "SD28 >= 0 & SD28 <= 5"),
+        ("(>= 0 & <= 500000) | -95, -55", "(SD28 >= 0 & SD28 <= 500000) | SD28 == -95, -55"),
+        ("SD28 == 1-5 + -95", "SD28 == 1-5 + -95"),
+    ],
+)
+def test_every_comparison_gets_the_name(rangeCondition, expected):
+    line = variableLineText("SD28", rangeCondition, "SD27 == 2")
+
+    assert line == f"{expected}; SD27 == 2"
+    assert parser().parseLine(line).compiledRange.variable == "SD28"
+
+
+def test_comparison_without_name_names_the_row():
+    with pytest.raises(Exception, match="row 3"):
+        variableLineText(None, ">= 0 & <= 5", location="row 3")